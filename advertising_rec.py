@@ -18,12 +18,26 @@
 
 # reading in data and importing lbiraries
 import pandas as pd
-import matplotlib.pyplot as plt
-
-
-get_ipython().magic('matplotlib inline')
-direct_link = 'https://raw.githubusercontent.com/freeCodeCamp/2017-new-coder-survey/master/clean-data/2017-fCC-New-Coders-Survey-Data.csv'
-fcc = pd.read_csv(direct_link, low_memory = 0)
+from plotting import plt, sns, inline
+from fcc_loader import fcc_schema, load_fcc_survey, money_per_month, survey_source
+from dataset_cache import DatasetCache
+from job_roles import RoleMatrix
+from outlier_rules import apply_rules
+from bootstrap import bootstrap_ci
+from budget_optimizer import BudgetModel, market_table
+from country_index import CountryIndex
+from fcc_store import SurveyStore
+
+
+inline()
+
+# only read the columns we use, with compact types, in chunks; the parsed
+# frame is cached locally and only downloaded again when the file changes.
+# set FCC_SURVEY_SOURCE (or put a copy of the csv next to the notebook) to
+# read from a mirror instead of GitHub
+cache = DatasetCache()
+fcc = cache.fetch(survey_source(), lambda source: load_fcc_survey(source, fcc_schema),
+                  variant = str(fcc_schema))
 
 print(fcc.shape)
 pd.options.display.max_columns = 150
@@ -53,12 +67,12 @@ fcc['JobRoleInterest'].value_counts(normalize=True) * 100
 # In[59]:
 
 
-# Split each string in the 'JobRoleInterest' column
-interests_no_nulls = fcc['JobRoleInterest'].dropna()
-splitted_interests = interests_no_nulls.str.split(',')
+# Split each string in the 'JobRoleInterest' column once into a
+# respondent x role indicator matrix
+roles = RoleMatrix(fcc['JobRoleInterest'])
 
 # Frequency table for the var describing the number of options
-n_of_options = splitted_interests.apply(lambda x: len(x)) # x is a list of job options
+n_of_options = roles.n_options()
 n_of_options.value_counts(normalize = True).sort_index() * 100
 
 
@@ -70,13 +84,12 @@ n_of_options.value_counts(normalize = True).sort_index() * 100
 
 
 # Frequency table
-web_or_mobile = interests_no_nulls.str.contains(
-    'Web Developer|Mobile Developer') # returns an array of booleans
+web_or_mobile = roles.any_of(roles.matching(
+    'Web Developer|Mobile Developer')) # returns an array of booleans
 freq_table = web_or_mobile.value_counts(normalize = True) * 100
 print(freq_table)
 
 # Graph for the frequency table above
-import matplotlib.pyplot as plt
 plt.style.use('fivethirtyeight')
 
 freq_table.plot.bar()
@@ -129,11 +142,9 @@ pd.DataFrame(data = {'Absolute Frequency': absolute_frequencies,
 # In[62]:
 
 
-# Replace 0s with 1s to avoid division by 0
-fcc_good['MonthsProgramming'].replace(0,1, inplace = True)
-
 # New column for the amount of money each student spends each month
-fcc_good['money_per_month'] = fcc_good['MoneyForLearning'] / fcc_good['MonthsProgramming']
+# (0 months are replaced with 1 to avoid division by 0)
+fcc_good['money_per_month'] = money_per_month(fcc_good)
 fcc_good['money_per_month'].isnull().sum()
 
 
@@ -160,10 +171,11 @@ fcc_good['CountryLive'].value_counts().head()
 
 
 # Mean sum of money spent by students each month
-countries_mean = fcc_good.groupby('CountryLive').mean()
-countries_mean['money_per_month'][['United States of America',
-                            'India', 'United Kingdom',
-                            'Canada']]
+country_index = CountryIndex(fcc_good['CountryLive'])
+countries_mean = country_index.mean(fcc_good['money_per_month'])
+countries_mean[['United States of America',
+                'India', 'United Kingdom',
+                'Canada']]
 
 
 # The results for India's money spent per month learning programming compared to Canada or the UK is quite surprising considering socio-economic factors such as GDP per capita, as India is quite low comparatively to Canada and the UK we would expect them to be less willing to spend.
@@ -174,10 +186,10 @@ countries_mean['money_per_month'][['United States of America',
 
 
 # Isolate only the countries of interest
-only_4 = fcc_good[fcc_good['CountryLive'].str.contains('United States of America|India|United Kingdom|Canada')]
+top_4 = ['United States of America', 'United Kingdom', 'India', 'Canada']
+only_4 = country_index.take(fcc_good, top_4)
 
 # Box plots to visualize distributions
-import seaborn as sns
 sns.boxplot(y = 'money_per_month', x = 'CountryLive',
             data = only_4)
 plt.title('Money Spent Per Month Per Country\n(Distributions)',
@@ -201,18 +213,18 @@ fcc_good = fcc_good[fcc_good['money_per_month'] < 20000]
 
 
 # Recompute mean sum of money spent by students each month
-countries_mean = fcc_good.groupby('CountryLive').mean()
-countries_mean['money_per_month'][['United States of America',
-                            'India', 'United Kingdom',
-                            'Canada']]
+country_index = CountryIndex(fcc_good['CountryLive'])
+countries_mean = country_index.mean(fcc_good['money_per_month'])
+countries_mean[['United States of America',
+                'India', 'United Kingdom',
+                'Canada']]
 
 
 # In[69]:
 
 
 # Isolate again the countries of interest
-only_4 = fcc_good[fcc_good['CountryLive'].str.contains(
-    'United States of America|India|United Kingdom|Canada')]
+only_4 = country_index.take(fcc_good, top_4)
 
 # Box plots to visualize distributions
 sns.boxplot(y = 'money_per_month', x = 'CountryLive',
@@ -248,8 +260,12 @@ india_outliers
 # In[71]:
 
 
-# Remove the outliers for India
-only_4 = only_4.drop(india_outliers.index) # using the row labels
+# Rules for the outliers to remove - they are all dropped in one pass below
+outlier_rules = [
+    {'name': 'india_outliers',
+     'conditions': [('CountryLive', '==', 'India'),
+                    ('money_per_month', '>=', 2500)]},
+]
 
 
 # Lets also look at the extreme outliers for the US which includes any values over $6000.
@@ -276,22 +292,17 @@ us_outliers
 # In[73]:
 
 
-no_bootcamp = only_4[
-    (only_4['CountryLive'] == 'United States of America') &
-    (only_4['money_per_month'] >= 6000) &
-    (only_4['AttendedBootcamp'] == 0 )
-]
-
-only_4 = only_4.drop(no_bootcamp.index)
-
-less_than_3_months = only_4[
-    (only_4['CountryLive'] == 'United States of America') &
-    (only_4['money_per_month'] >= 6000) &
-    (only_4['MonthsProgramming'] <= 3)
+outlier_rules += [
+    {'name': 'no_bootcamp',
+     'conditions': [('CountryLive', '==', 'United States of America'),
+                    ('money_per_month', '>=', 6000),
+                    ('AttendedBootcamp', '==', 0)]},
+    {'name': 'less_than_3_months',
+     'conditions': [('CountryLive', '==', 'United States of America'),
+                    ('money_per_month', '>=', 6000),
+                    ('MonthsProgramming', '<=', 3)]},
 ]
 
-only_4 = only_4.drop(less_than_3_months.index)
-
 
 # Next let's look at Canada's outliers - that is a person who spends more than roughly $5000/month.
 
@@ -310,7 +321,15 @@ canada_outliers
 # In[78]:
 
 
-only_4 = only_4.drop(canada_outliers.index)
+outlier_rules += [
+    {'name': 'canada_outliers',
+     'conditions': [('CountryLive', '==', 'Canada'),
+                    ('money_per_month', '>=', 5000)]},
+]
+
+# Remove every outlier in a single pass and show how many rows each rule removed
+only_4, outlier_audit = apply_rules(only_4, outlier_rules)
+outlier_audit
 
 
 # Now I am going to recompute the mean values of each country without the outliers.
@@ -319,7 +338,18 @@ only_4 = only_4.drop(canada_outliers.index)
 
 
 # Recompute mean sum of money spent by students each month
-only_4.groupby('CountryLive').mean()['money_per_month']
+only_4.groupby('CountryLive', observed=True)['money_per_month'].mean().sort_index()
+
+
+# The choice between India and Canada depends on these averages, so let's check how precise they are. We'll compute bootstrap confidence intervals for the mean and median monthly spend in every country at once.
+
+# In[81]:
+
+
+# 95% bootstrap confidence intervals (fixed seed so the numbers are reproducible)
+spend_ci = bootstrap_ci(only_4['money_per_month'], only_4['CountryLive'],
+                        n_resamples = 10000, seed = 59)
+spend_ci
 
 
 # In[82]:
@@ -363,3 +393,60 @@ only_4['CountryLive'].value_counts(normalize = True) * 100
 # 3. Advertise only in the US
 # 
 # I think that this analysis could be forwarded to the marketing team and let them decide the best course of action. We could also try to run a survey in the US, India and Canada to gather more information.
+
+# ### Comparing Budget Splits
+# To give the marketing team something more concrete than hand-picked splits, we can estimate the expected monthly revenue of any split. Every country is a market with its share of respondents and its average spend per month, and a reached customer is more likely to subscribe the closer their spend is to our $59 price. Spending more in a market gives diminishing returns once the budget outgrows the size of the market.
+
+# In[85]:
+
+
+# Markets from every country, with the same outliers removed as above
+fcc_clean, _ = apply_rules(fcc_good, outlier_rules)
+markets = market_table(fcc_clean, min_respondents = 30)
+budget = BudgetModel(markets, price = 59)
+
+# Expected revenue of the splits suggested above
+pd.Series({
+    'US 60 / India 25 / Canada 15': budget.revenue({'United States of America': 0.6,
+                                                    'India': 0.25, 'Canada': 0.15}),
+    'US 70 / India 30': budget.revenue({'United States of America': 0.7, 'India': 0.3}),
+    'US 75 / Canada 25': budget.revenue({'United States of America': 0.75, 'Canada': 0.25}),
+    'US only': budget.revenue({'United States of America': 1.0}),
+})
+
+
+# In[86]:
+
+
+# Best split for every pair and triple of the ten largest markets
+best_pairs = budget.grid(k = 2, step = 0.05)
+best_triples = budget.grid(k = 3, step = 0.05)
+best_triples.head(10)
+
+
+# In[87]:
+
+
+# Expected revenue curve for the US/India split
+budget.curves(['United States of America', 'India']).plot(
+    x = 'United States of America', y = 'revenue', legend = False)
+plt.xlabel('Share of budget for the US (rest to India)')
+plt.ylabel('Expected revenue')
+plt.show()
+
+# Best split if we advertised in every market
+budget.optimize().head(10)
+
+
+# ### Tracking the Markets Across Survey Years
+# freeCodeCamp runs this survey every year, so we keep per-country and per-role summaries of the monthly spend for each survey year in a store. Adding a new year only summarizes that year's file, and the trends below come straight from the stored summaries.
+
+# In[88]:
+
+
+store = SurveyStore()
+if 2017 not in store.years():
+    store.add_year(2017, fcc)
+
+# Spend per month by country for every stored year
+store.trend('country', 'mean', keys = top_4)
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Bootstrap confidence intervals for per-group statistics.
+#
+# Every group is resampled with a matrix of random indices (resamples x group
+# size) instead of a Python loop per resample, in batches small enough to keep
+# memory flat. Groups are spread over a process pool, and each group draws from
+# its own child of one SeedSequence so a fixed seed gives the same intervals no
+# matter how many processes run them.
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+
+# rough number of resampled values held in memory at once per worker
+batch_elements = 2000000
+
+_statistics = {
+    'mean': lambda samples: samples.mean(axis=1),
+    'median': lambda samples: np.median(samples, axis=1),
+}
+
+
+def resample_statistics(values, stats, n_resamples, seed):
+    """n_resamples x len(stats) array of bootstrap replicates of `stats` over `values`."""
+    rng = np.random.default_rng(seed)
+    n = len(values)
+    batch = max(1, batch_elements // max(n, 1))
+
+    out = np.empty((n_resamples, len(stats)))
+    for start in range(0, n_resamples, batch):
+        stop = min(start + batch, n_resamples)
+        samples = values[rng.integers(0, n, size=(stop - start, n))]
+        for j, stat in enumerate(stats):
+            out[start:stop, j] = _statistics[stat](samples)
+    return out
+
+
+def _group_interval(args):
+    values, stats, n_resamples, confidence, seed = args
+    replicates = resample_statistics(values, stats, n_resamples, seed)
+    alpha = (1 - confidence) / 2
+    low, high = np.quantile(replicates, [alpha, 1 - alpha], axis=0)
+
+    row = {'n': len(values)}
+    for j, stat in enumerate(stats):
+        row[stat] = _statistics[stat](values[None, :])[0]
+        row[stat + '_low'] = low[j]
+        row[stat + '_high'] = high[j]
+    return row
+
+
+def bootstrap_ci(values, groups, stats=('mean', 'median'), n_resamples=10000,
+                 confidence=0.95, seed=None, processes=None):
+    """Percentile bootstrap CIs of `stats` of `values` for every group in `groups`.
+
+    Returns one row per group with the point estimate and the lower/upper
+    bounds of each statistic. Pass `seed` for reproducible intervals and
+    `processes=1` to stay in the current process.
+    """
+    for stat in stats:
+        if stat not in _statistics:
+            raise ValueError('unknown statistic {0!r}'.format(stat))
+
+    values = np.asarray(values, dtype=np.float64)
+    codes, uniques = pd.factorize(groups, sort=True)
+    keep = (codes >= 0) & ~np.isnan(values)
+    codes = codes[keep]
+    values = values[keep]
+
+    # split the values by group with one sort instead of a mask per group
+    order = np.argsort(codes, kind='stable')
+    bounds = np.cumsum(np.bincount(codes, minlength=len(uniques)))[:-1]
+    per_group = np.split(values[order], bounds)
+
+    seeds = np.random.SeedSequence(seed).spawn(len(uniques))
+    tasks = [(group_values, tuple(stats), n_resamples, confidence, group_seed)
+             for group_values, group_seed in zip(per_group, seeds)
+             if len(group_values)]
+    names = [name for name, group_values in zip(uniques, per_group) if len(group_values)]
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if processes == 1 or len(tasks) < 2:
+        rows = [_group_interval(task) for task in tasks]
+    else:
+        # big groups first so the pool doesn't end up waiting on one of them
+        order = sorted(range(len(tasks)), key=lambda i: -len(tasks[i][0]))
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            results = pool.map(_group_interval, [tasks[i] for i in order])
+            rows = [None] * len(tasks)
+            for i, row in zip(order, results):
+                rows[i] = row
+
+    index = pd.Index(names, name=getattr(groups, 'name', None))
+    return pd.DataFrame(rows, index=index)
@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Splitting an advertising budget across markets.
+#
+# Each market has a share of the potential customers and an estimate of how
+# much they spend on learning per month. We model the expected monthly revenue
+# of putting a fraction `w` of the budget into a market as
+#
+#     price * share * willingness * (1 - exp(-saturation * w / share))
+#
+# where `willingness = min(1, spend / price)` is the chance a reached customer
+# can afford the subscription, and the exponential gives diminishing returns
+# once a market's budget outgrows its size. The model is concave and separable,
+# so the best split over all markets has a closed form up to one scalar
+# (water-filling), and splits over a few markets can be scanned on a grid.
+
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+
+price = 59 # subscription price in dollars per month
+
+
+def market_table(frame, country='CountryLive', spend='money_per_month', min_respondents=1):
+    """Respondent share and mean spend per country, sorted by share."""
+    grouped = frame.groupby(country, observed=True)[spend]
+    markets = pd.DataFrame({
+        'respondents': grouped.size(),
+        'spend': grouped.mean(),
+    })
+    markets = markets[markets['respondents'] >= min_respondents]
+    markets['share'] = markets['respondents'] / markets['respondents'].sum()
+    return markets.sort_values('share', ascending=False)
+
+
+def simplex_grid(k, step):
+    """Every split of the budget over `k` markets in increments of `step`."""
+    n = int(round(1 / step))
+    points = list(combinations(range(n + k - 1), k - 1))
+    # stars and bars: the gaps between bar positions are the integer parts
+    bars = np.array(points, dtype=np.int64).reshape(len(points), k - 1)
+    edges = np.hstack([np.full((len(bars), 1), -1), bars, np.full((len(bars), 1), n + k - 1)])
+    return (np.diff(edges, axis=1) - 1) / n
+
+
+class BudgetModel:
+    """Expected revenue of budget splits over the markets in `markets` (see `market_table`)."""
+
+    def __init__(self, markets, price=price, saturation=1.0):
+        self.markets = markets
+        self.names = markets.index
+        self.price = price
+        self.saturation = saturation
+        self.share = markets['share'].to_numpy(dtype=np.float64)
+        self.willingness = np.minimum(1, markets['spend'].to_numpy(dtype=np.float64) / price)
+
+    def _revenue(self, weights, cols):
+        share = self.share[cols]
+        scale = self.price * share * self.willingness[cols]
+        return (scale * -np.expm1(-self.saturation * weights / share)).sum(axis=-1)
+
+    def revenue(self, allocation):
+        """Expected revenue of a {country: fraction} split."""
+        cols = self.names.get_indexer(list(allocation))
+        if (cols < 0).any():
+            raise KeyError('unknown markets: {0}'.format(
+                [name for name, col in zip(allocation, cols) if col < 0]))
+        return float(self._revenue(np.array(list(allocation.values()), dtype=np.float64), cols))
+
+    def grid(self, k=2, step=0.05, top=10):
+        """Best split for every combination of `k` of the `top` markets, scanned on a grid.
+
+        All combinations x grid points are evaluated as one array, and the
+        result is sorted by expected revenue.
+        """
+        top = min(top, len(self.names))
+        if not 1 <= k <= top:
+            raise ValueError('k must be between 1 and the {0} markets considered, got {1}'.format(
+                top, k))
+        combos = np.array(list(combinations(range(top), k)), dtype=np.int64)
+        weights = simplex_grid(k, step)
+
+        # combos x grid points x markets
+        revenue = self._revenue(weights[None, :, :], combos[:, None, :])
+        best = revenue.argmax(axis=1)
+
+        rows = {'markets': [tuple(self.names[c]) for c in combos],
+                'revenue': revenue[np.arange(len(combos)), best]}
+        for j in range(k):
+            rows['w{0}'.format(j + 1)] = weights[best, j]
+        return pd.DataFrame(rows).sort_values('revenue', ascending=False, ignore_index=True)
+
+    def curves(self, markets, step=0.01):
+        """Expected revenue along the grid of splits between `markets`."""
+        cols = self.names.get_indexer(list(markets))
+        weights = simplex_grid(len(cols), step)
+        frame = pd.DataFrame(weights, columns=list(markets))
+        frame['revenue'] = self._revenue(weights, cols)
+        return frame
+
+    def optimize(self, tol=1e-12):
+        """Best split over all markets.
+
+        The marginal revenue of market c at fraction w is
+        `a_c * exp(-saturation * w / share_c)`, so at the optimum every funded
+        market has the same marginal revenue `lam` and
+        `w_c = max(0, share_c / saturation * log(a_c / lam))`. We bisect on
+        `lam` until the fractions sum to one.
+        """
+        a = self.price * self.willingness * self.saturation
+        funded = a > 0
+        if not funded.any():
+            raise ValueError('no market has a positive spend estimate')
+
+        def fractions(lam):
+            w = np.zeros(len(a))
+            w[funded] = np.maximum(0, self.share[funded] / self.saturation
+                                   * np.log(a[funded] / lam))
+            return w
+
+        # bisect in log space, the total falls as lam grows
+        low, high = np.log(a[funded].max()) - 50, np.log(a[funded].max())
+        while high - low > tol:
+            mid = (low + high) / 2
+            if fractions(np.exp(mid)).sum() > 1:
+                low = mid
+            else:
+                high = mid
+        w = fractions(np.exp(high))
+        w /= w.sum()
+
+        allocation = pd.Series(w, index=self.names, name='allocation')
+        return allocation[allocation > 0].sort_values(ascending=False)
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Shrinking a wide frame to the narrowest dtypes that hold its values.
+#
+# Numeric columns are downcast only when no value changes: whole-number
+# floats become the smallest integer type that fits, other floats become
+# float32 when every value survives the round trip, and integers get the
+# smallest integer type. Repeated strings (boroughs, districts, program
+# types) become categoricals, so they are stored once and grouping on them
+# works on the integer codes.
+
+import numpy as np
+import pandas as pd
+
+
+def _narrow_float(column):
+    values = column.to_numpy()
+    if len(values) and not np.isnan(values).any() and np.abs(values).max() < 2 ** 53 \
+            and np.array_equal(values, np.round(values)):
+        return pd.to_numeric(column, downcast='integer')
+    if np.array_equal(values.astype(np.float32), values, equal_nan=True):
+        return column.astype(np.float32)
+    return column
+
+
+def _narrow(column, max_unique):
+    kind = column.dtype.kind
+    if kind == 'f':
+        return _narrow_float(column)
+    if kind == 'i':
+        return pd.to_numeric(column, downcast='integer')
+    if kind == 'u':
+        return pd.to_numeric(column, downcast='unsigned')
+    if kind == 'O' and column.nunique() <= max_unique:
+        return column.astype('category')
+    return column
+
+
+def compact(frame, categories=(), max_unique_ratio=0.5):
+    """Copy of `frame` with narrowed numeric columns and categorical strings.
+
+    Columns in `categories` always become categoricals; other object columns
+    do when their distinct values are at most `max_unique_ratio` of the rows.
+    Returns the compacted frame and a per-column report of dtypes and bytes
+    before and after (with a 'total' row).
+    """
+    max_unique = int(max_unique_ratio * len(frame))
+    columns = {}
+    for col in frame.columns:
+        column = frame[col]
+        if col in categories:
+            columns[col] = column.astype('category')
+        else:
+            columns[col] = _narrow(column, max_unique)
+    result = pd.DataFrame(columns, index=frame.index)
+
+    before = frame.memory_usage(deep=True, index=False)
+    after = result.memory_usage(deep=True, index=False)
+    report = pd.DataFrame({
+        'dtype_before': frame.dtypes.astype(str),
+        'dtype_after': result.dtypes.astype(str),
+        'bytes_before': before,
+        'bytes_after': after,
+    })
+    report.loc['total'] = ['', '', before.sum(), after.sum()]
+    return result, report
@@ -0,0 +1,211 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Correlations of one target column against a chosen set of columns.
+#
+# `frame.corr()[target]` computes the full pairwise matrix over every numeric
+# column only to keep one column of it. `Correlator` keeps per-column means,
+# standard deviations and the centered target around, so correlating a
+# target with k columns is k dot products. Cached statistics are keyed by the
+# column's underlying array (which the cache holds on to, so its memory can't
+# be handed to a replacement column), so reassigning a column (or
+# adding/removing one) invalidates them automatically; call `invalidate()`
+# after editing values in place.
+#
+# Missing values are handled pairwise like pandas: a pair of columns only
+# uses the rows where both are present. p-values and confidence intervals use
+# the Fisher z transform.
+#
+# Given the `Missingness` that `impute` returned, `exclude_imputed=True`
+# treats the filled cells as missing again.
+
+import math
+
+import numpy as np
+import pandas as pd
+
+
+_erfc = np.frompyfunc(math.erfc, 1, 1)
+
+
+def _fingerprint(values):
+    # where the data lives and what it looks like; changes whenever the
+    # column is replaced
+    interface = values.__array_interface__
+    return (interface['data'][0], values.shape, values.strides, values.dtype.str)
+
+
+class Correlator:
+    """Pearson correlations against a target column, reusing cached column statistics."""
+
+    def __init__(self, frame, missing=None):
+        self.frame = frame
+        self.missing = missing
+        self._stats = {}
+        self._centered = {}
+        # the arrays the fingerprints were taken from, kept alive so their
+        # addresses can't be reused while the statistics are cached
+        self._sources = {}
+
+    def invalidate(self, columns=None):
+        """Forget cached statistics for `columns` (default: all of them)."""
+        if columns is None:
+            self._stats.clear()
+            self._centered.clear()
+            self._sources.clear()
+            return
+        for col in columns:
+            for exclude in (False, True):
+                self._stats.pop((col, exclude), None)
+                self._centered.pop((col, exclude), None)
+                self._sources.pop((col, exclude), None)
+
+    def numeric_columns(self):
+        return list(self.frame.select_dtypes(include=['number', 'bool']).columns)
+
+    def _column(self, col, exclude=False):
+        """(values, fingerprint, mean, std, complete) for one column, cached."""
+        raw = self.frame[col].to_numpy()
+        key = _fingerprint(raw)
+        exclude = exclude and self.missing is not None and col in self.missing
+        cached = self._stats.get((col, exclude))
+        if cached is None or cached[1] != key:
+            values = raw.astype(np.float64, copy=False)
+            if exclude:
+                values = np.where(self.missing.mask(col), np.nan, values)
+            valid = ~np.isnan(values)
+            complete = bool(valid.all())
+            mean = values[valid].mean() if valid.any() else np.nan
+            std = values[valid].std(ddof=1) if valid.sum() > 1 else np.nan
+            cached = (values, key, mean, std, complete)
+            self._stats[(col, exclude)] = cached
+            self._sources[(col, exclude)] = raw
+            self._centered.pop((col, exclude), None)
+        return cached
+
+    def _centered_target(self, target, exclude=False):
+        values, key, mean, std, complete = self._column(target, exclude)
+        cached = self._centered.get((target, exclude))
+        if cached is None or cached[0] != key:
+            cached = (key, np.where(np.isnan(values), 0.0, values - mean))
+            self._centered[(target, exclude)] = cached
+        return cached[1]
+
+    def _pairwise(self, x, y):
+        """Correlation and pair count of `y` against each column of `x`, on rows where both are present."""
+        mx = ~np.isnan(x)
+        my = ~np.isnan(y)
+        m = mx & my[:, None]
+        x0 = np.where(m, x, 0.0)
+        y0 = np.where(m, y[:, None], 0.0)
+        n = m.sum(axis=0)
+        sx = x0.sum(axis=0)
+        sy = y0.sum(axis=0)
+        sxx = (x0 ** 2).sum(axis=0)
+        syy = (y0 ** 2).sum(axis=0)
+        sxy = (x0 * y0).sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            r = (n * sxy - sx * sy) / np.sqrt((n * sxx - sx ** 2) * (n * syy - sy ** 2))
+        return r, n
+
+    def with_target(self, target, columns=None, pvalues=False, confidence=None,
+                    exclude_imputed=False):
+        """Correlation of `target` with `columns` (default: every numeric column).
+
+        With `pvalues` and/or `confidence` (e.g. 0.95) a frame is returned
+        with the pair count, p-value and interval bounds next to `r`.
+        `exclude_imputed` leaves out the cells recorded in `missing`.
+        """
+        if columns is None:
+            columns = self.numeric_columns()
+        columns = list(columns)
+
+        exclude = exclude_imputed
+        t_values, _, t_mean, t_std, t_complete = self._column(target, exclude)
+        r = np.empty(len(columns))
+        n = np.empty(len(columns))
+
+        fast = []
+        slow = []
+        for i, col in enumerate(columns):
+            complete = self._column(col, exclude)[4]
+            (fast if complete and t_complete else slow).append(i)
+
+        if fast:
+            # complete columns: one dot product each against the centered target
+            centered = self._centered_target(target, exclude)
+            count = len(t_values)
+            for i in fast:
+                values, _, mean, std, _ = self._column(columns[i], exclude)
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    r[i] = (values - mean) @ centered / ((count - 1) * std * t_std)
+                n[i] = count
+        if slow:
+            x = np.column_stack([self._column(columns[i], exclude)[0] for i in slow])
+            r[slow], n[slow] = self._pairwise(x, t_values)
+
+        # the target against itself is exactly 1 (like DataFrame.corr)
+        r = np.clip(r, -1, 1)
+        r[[col == target for col in columns]] = 1.0
+        result = pd.Series(r, index=pd.Index(columns), name=target)
+        if not pvalues and confidence is None:
+            return result
+        return self._inference(result, n, pvalues, confidence)
+
+    def _inference(self, r, n, pvalues, confidence):
+        table = pd.DataFrame({'r': r, 'n': n.astype(int)})
+        with np.errstate(invalid='ignore', divide='ignore'):
+            z = np.arctanh(r.to_numpy().clip(-1 + 1e-15, 1 - 1e-15))
+            se = 1 / np.sqrt(n - 3)
+        if pvalues:
+            table['p'] = np.asarray(_erfc(np.abs(z) / se / math.sqrt(2)), dtype=np.float64)
+        if confidence is not None:
+            # normal quantile by bisection on erfc, so we don't need scipy
+            target = 1 - confidence
+            low, high = 0.0, 10.0
+            for _ in range(60):
+                mid = (low + high) / 2
+                if math.erfc(mid / math.sqrt(2)) > target:
+                    low = mid
+                else:
+                    high = mid
+            table['low'] = np.tanh(z - high * se)
+            table['high'] = np.tanh(z + high * se)
+        return table
+
+    def matrix(self, columns=None, block=128, exclude_imputed=False):
+        """Full correlation matrix over `columns`, computed `block` columns at a time.
+
+        Only two blocks of standardized columns are held at once, so wide
+        tables don't need a second full-width copy.
+        """
+        if columns is None:
+            columns = self.numeric_columns()
+        columns = list(columns)
+        k = len(columns)
+        out = np.empty((k, k))
+
+        def standardized(cols):
+            block_values = []
+            complete = True
+            for col in cols:
+                values, _, mean, std, col_complete = self._column(col, exclude_imputed)
+                complete &= col_complete
+                block_values.append((values - mean) / std if col_complete else values)
+            return np.column_stack(block_values), complete
+
+        for i in range(0, k, block):
+            zi, ci = standardized(columns[i:i + block])
+            for j in range(i, k, block):
+                zj, cj = standardized(columns[j:j + block])
+                if ci and cj:
+                    with np.errstate(invalid='ignore'):
+                        tile = zi.T @ zj / (len(zi) - 1)
+                else:
+                    tile = np.column_stack([self._pairwise(zi, zj[:, c])[0]
+                                            for c in range(zj.shape[1])])
+                out[i:i + block, j:j + block] = tile
+                out[j:j + block, i:i + block] = tile.T
+
+        np.fill_diagonal(out, 1.0)
+        return pd.DataFrame(np.clip(out, -1, 1), index=columns, columns=columns)
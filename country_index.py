@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Row index over a categorical column such as `CountryLive`.
+#
+# The column's categorical codes are sorted once into per-category runs of row
+# positions, so selecting a handful of countries is a gather over those runs
+# rather than a string comparison (or regex) over every row, and grouped
+# statistics reuse the same codes through `np.bincount`.
+
+import numpy as np
+import pandas as pd
+
+
+class CountryIndex:
+    """Category -> row positions index for one column of a frame."""
+
+    def __init__(self, column):
+        if not isinstance(column.dtype, pd.CategoricalDtype):
+            column = column.astype('category')
+        self.name = column.name
+        self.categories = column.cat.categories
+        self.codes = column.cat.codes.to_numpy()
+
+        # positions of each category laid out back to back, missing values dropped
+        order = np.argsort(self.codes, kind='stable')
+        self.positions = order[self.codes[order] >= 0]
+        counts = np.bincount(self.codes[self.codes >= 0], minlength=len(self.categories))
+        self.offsets = np.concatenate([[0], np.cumsum(counts)])
+
+    def __len__(self):
+        return len(self.codes)
+
+    def _code(self, name):
+        code = self.categories.get_indexer([name])[0]
+        if code < 0:
+            raise KeyError(name)
+        return code
+
+    def rows(self, names):
+        """Row positions of every row whose value is one of `names`, in frame order."""
+        runs = [self.positions[self.offsets[code]:self.offsets[code + 1]]
+                for code in map(self._code, names)]
+        if not runs:
+            return np.array([], dtype=np.intp)
+        return np.sort(np.concatenate(runs))
+
+    def take(self, frame, names):
+        """Rows of `frame` (the frame the index was built on) for the categories in `names`.
+
+        The indexed column of the result only keeps `names` as categories, in
+        the order given, so plots and groupbys don't show empty countries.
+        """
+        if len(frame) != len(self):
+            raise ValueError('frame has {0} rows but the index was built on {1}'.format(
+                len(frame), len(self)))
+        subset = frame.iloc[self.rows(names)].copy()
+        subset[self.name] = pd.Categorical(subset[self.name], categories=list(names))
+        return subset
+
+    def counts(self):
+        return pd.Series(np.diff(self.offsets), index=self.categories, name=self.name)
+
+    def mean(self, values):
+        """Mean of `values` per category, ignoring missing values."""
+        values = np.asarray(values, dtype=np.float64)
+        valid = (self.codes >= 0) & ~np.isnan(values)
+        sums = np.bincount(self.codes[valid], weights=values[valid],
+                           minlength=len(self.categories))
+        counts = np.bincount(self.codes[valid], minlength=len(self.categories))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return pd.Series(sums / counts, index=self.categories)
@@ -0,0 +1,262 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Local cache for datasets we read over HTTP or from a file mirror.
+#
+# Parsed frames are stored as uncompressed feather files named by the hash of
+# the raw download and the parse variant, so a warm run is a memory-mapped read instead of a
+# download plus a CSV parse. Each source (url + parse variant) remembers its
+# ETag/Last-Modified (or size/mtime for local files) so it can be revalidated
+# cheaply, and the least recently used objects are evicted once the cache grows
+# past `max_bytes`.
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+import pyarrow as pa
+import pyarrow.feather as feather
+
+
+# schema metadata entry holding the parsed frame's dtypes
+_dtypes_key = b'dataset_cache.dtypes'
+
+
+def _hash_key(*parts):
+    return hashlib.sha256('\0'.join(parts).encode('utf-8')).hexdigest()
+
+
+class DatasetCache:
+    """Content-addressed store of parsed frames keyed by source and parse variant."""
+
+    def __init__(self, root='.dataset_cache', max_bytes=2 * 1024 ** 3, max_age=0,
+                 timeout=30):
+        self.root = root
+        self.max_bytes = max_bytes
+        # seconds during which a cached source is served without revalidating
+        self.max_age = max_age
+        self.timeout = timeout
+        self.objects_dir = os.path.join(root, 'objects')
+        self.index_path = os.path.join(root, 'index.json')
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self.index = self._read_index()
+        # several sources can be fetched from threads at once; parsing happens
+        # outside the lock, index and object bookkeeping inside it
+        self._lock = threading.RLock()
+
+    # ----- index bookkeeping -----
+
+    def _read_index(self):
+        try:
+            with open(self.index_path) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _write_index(self):
+        with self._lock:
+            fd, tmp = tempfile.mkstemp(dir=self.root, suffix='.json')
+            with os.fdopen(fd, 'w') as f:
+                json.dump(self.index, f, indent=1, sort_keys=True)
+            os.replace(tmp, self.index_path)
+
+    def _object_path(self, digest):
+        return os.path.join(self.objects_dir, digest + '.feather')
+
+    def _has_object(self, entry):
+        return entry is not None and os.path.exists(self._object_path(entry['digest']))
+
+    # ----- reading and writing frames -----
+
+    def _load(self, key):
+        with self._lock:
+            entry = self.index[key]
+            entry['last_used'] = time.time()
+            self._write_index()
+        table = feather.read_table(self._object_path(entry['digest']), memory_map=True)
+        frame = table.to_pandas()
+        # arrow round trips can change dtypes (object strings come back as
+        # `str` on newer pandas), so restore the ones the parse produced
+        metadata = table.schema.metadata or {}
+        if _dtypes_key in metadata:
+            dtypes = json.loads(metadata[_dtypes_key])
+            changed = {col: dtype for col, dtype in dtypes.items()
+                       if col in frame.columns and str(frame[col].dtype) != dtype}
+            if changed:
+                frame = frame.astype(changed)
+        return frame
+
+    def _store(self, key, digest, frame, validators):
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            fd, tmp = tempfile.mkstemp(dir=self.objects_dir, suffix='.feather')
+            os.close(fd)
+            try:
+                table = pa.Table.from_pandas(frame.reset_index(drop=True), preserve_index=False)
+                dtypes = json.dumps({str(col): str(dtype) for col, dtype in frame.dtypes.items()})
+                metadata = dict(table.schema.metadata or {})
+                metadata[_dtypes_key] = dtypes.encode('utf-8')
+                table = table.replace_schema_metadata(metadata)
+                # uncompressed so the file can be memory-mapped on read
+                feather.write_feather(table, tmp, compression='uncompressed')
+            except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+                # e.g. object columns mixing numbers and strings; serve it uncached
+                os.remove(tmp)
+                return frame
+            os.replace(tmp, path)
+
+        entry = dict(validators)
+        entry.update(digest=digest, size=os.path.getsize(path), last_used=time.time())
+        with self._lock:
+            self.index[key] = entry
+            self._evict(keep=digest)
+            self._write_index()
+        return frame
+
+    def _evict(self, keep):
+        # objects can be shared by several sources, so size them by digest
+        sizes = {}
+        last_used = {}
+        for entry in self.index.values():
+            sizes[entry['digest']] = entry['size']
+            last_used[entry['digest']] = max(last_used.get(entry['digest'], 0),
+                                             entry['last_used'])
+
+        total = sum(sizes.values())
+        for digest in sorted(last_used, key=last_used.get):
+            if total <= self.max_bytes:
+                break
+            if digest == keep:
+                continue
+            try:
+                os.remove(self._object_path(digest))
+            except FileNotFoundError:
+                pass
+            total -= sizes[digest]
+            self.index = {k: e for k, e in self.index.items() if e['digest'] != digest}
+
+    # ----- downloading -----
+
+    def _download(self, response):
+        # stream to a temporary file while hashing so large dumps never sit in memory
+        sha = hashlib.sha256()
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix='.download')
+        with os.fdopen(fd, 'wb') as f:
+            for block in iter(lambda: response.read(1 << 20), b''):
+                sha.update(block)
+                f.write(block)
+        return tmp, sha.hexdigest()
+
+    def _parse_new(self, key, tmp, content, variant, parse, validators):
+        # the same bytes parsed with another variant give a different frame
+        digest = _hash_key(content, variant)
+        validators = dict(validators, content=content)
+        try:
+            with self._lock:
+                entry = self.index.get(key)
+                if self._has_object(entry) and entry['digest'] == digest:
+                    # same bytes under new validators, no need to parse again
+                    entry.update(validators)
+                    return self._load(key)
+                if os.path.exists(self._object_path(digest)):
+                    self.index[key] = dict(validators, digest=digest,
+                                           size=os.path.getsize(self._object_path(digest)),
+                                           last_used=time.time())
+                    return self._load(key)
+            return self._store(key, digest, parse(tmp), validators)
+        finally:
+            os.remove(tmp)
+
+    def _fetch_url(self, key, url, variant, parse):
+        entry = self.index.get(key)
+        request = urllib.request.Request(url)
+        if self._has_object(entry):
+            if entry.get('etag'):
+                request.add_header('If-None-Match', entry['etag'])
+            if entry.get('last_modified'):
+                request.add_header('If-Modified-Since', entry['last_modified'])
+
+        try:
+            response = urllib.request.urlopen(request, timeout=self.timeout)
+        except urllib.error.HTTPError as e:
+            if e.code == 304 and self._has_object(entry):
+                entry['checked'] = time.time()
+                return self._load(key)
+            raise
+        except (urllib.error.URLError, OSError):
+            # offline: fall back to whatever we have
+            if self._has_object(entry):
+                return self._load(key)
+            raise
+
+        with response:
+            validators = {
+                'source': url,
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'checked': time.time(),
+            }
+            tmp, content = self._download(response)
+        return self._parse_new(key, tmp, content, variant, parse, validators)
+
+    def _fetch_file(self, key, path, variant, parse):
+        entry = self.index.get(key)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            # mirror not mounted: fall back to whatever we have
+            if self._has_object(entry):
+                return self._load(key)
+            raise
+        validators = {
+            'source': path,
+            'file_size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'checked': time.time(),
+        }
+        if (self._has_object(entry) and entry.get('file_size') == stat.st_size
+                and entry.get('mtime_ns') == stat.st_mtime_ns):
+            return self._load(key)
+
+        with open(path, 'rb') as f:
+            tmp, content = self._download(f)
+        return self._parse_new(key, tmp, content, variant, parse, validators)
+
+    # ----- public API -----
+
+    def fetch(self, source, parse, variant=''):
+        """Return `parse(path)` for `source`, serving it from the cache when it is unchanged.
+
+        `source` is an http(s) url, a file:// url or a local path. `variant`
+        identifies the parse (e.g. the column schema) so different projections
+        of the same file are cached separately.
+        """
+        key = _hash_key(source, variant)
+        entry = self.index.get(key)
+        if (self.max_age and self._has_object(entry)
+                and time.time() - entry.get('checked', 0) < self.max_age):
+            return self._load(key)
+
+        scheme = urllib.parse.urlparse(source).scheme
+        if scheme in ('http', 'https'):
+            return self._fetch_url(key, source, variant, parse)
+        if scheme == 'file':
+            path = urllib.request.url2pathname(urllib.parse.urlparse(source).path)
+            return self._fetch_file(key, path, variant, parse)
+        return self._fetch_file(key, source, variant, parse)
+
+    def clear(self):
+        """Drop every cached object."""
+        for entry in self.index.values():
+            try:
+                os.remove(self._object_path(entry['digest']))
+            except FileNotFoundError:
+                pass
+        self.index = {}
+        self._write_index()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Character favorability answers as one small integer matrix.
+#
+# Every answer is stored as an int8 on an explicit scale (-2 very
+# unfavorably .. 2 very favorably), with `unfamiliar` and `unanswered` as
+# values off that scale, in one respondent x character matrix. Answer
+# distributions are one bincount over (character, answer) pairs, and with a
+# `SegmentCube` one bincount over (segment cell, character, answer) gives a
+# cross-tab cube from which every segment's answers are a sum, never a new
+# groupby over strings.
+
+import numpy as np
+import pandas as pd
+
+from correlations import Correlator
+
+
+scale = {
+    'Very unfavorably': -2,
+    'Somewhat unfavorably': -1,
+    'Neither favorably nor unfavorably (neutral)': 0,
+    'Somewhat favorably': 1,
+    'Very favorably': 2,
+}
+unfamiliar = 3
+unanswered = -128
+
+answers = dict(scale, **{'Unfamiliar (N/A)': unfamiliar})
+
+
+class FavorabilityMatrix:
+    """int8 respondent x character matrix of favorability answers."""
+
+    def __init__(self, frame, characters, answers=answers):
+        self.characters = list(characters)
+        self.index = frame.index
+        self.labels = list(answers)
+        self.codes = np.array(list(answers.values()), dtype=np.int8)
+        keys = pd.Index(self.labels, dtype=object)
+
+        values = np.full((len(frame), len(self.characters)), unanswered, dtype=np.int8)
+        for j, character in enumerate(self.characters):
+            column = frame[character]
+            if isinstance(column.dtype, pd.CategoricalDtype):
+                # translate the categories once, then take by code
+                position = keys.get_indexer(column.cat.categories)
+                if (position < 0).any():
+                    raise ValueError('unknown answers for {0!r}: {1}'.format(
+                        character, list(column.cat.categories[position < 0])))
+                codes = column.cat.codes.to_numpy()
+                found = codes >= 0
+                values[found, j] = self.codes[position[codes[found]]]
+            else:
+                position = keys.get_indexer(column)
+                blank = column.isna().to_numpy()
+                if ((position < 0) & ~blank).any():
+                    raise ValueError('unknown answers for {0!r}: {1}'.format(
+                        character, sorted(set(column[(position < 0) & ~blank]))))
+                values[~blank, j] = self.codes[position[~blank]]
+        self.values = values
+
+        # int8 value -> answer position (-1: unanswered)
+        self._position = np.full(256, -1, dtype=np.intp)
+        self._position[self.codes.astype(np.intp) + 128] = np.arange(len(self.codes))
+
+    def positions(self):
+        """Answer position (into `labels`) of every cell, -1 where unanswered."""
+        return self._position[self.values.astype(np.intp) + 128]
+
+    def scores(self):
+        """Float frame of the on-scale answers, NaN for unfamiliar or unanswered."""
+        on_scale = (self.values >= -2) & (self.values <= 2)
+        return pd.DataFrame(np.where(on_scale, self.values, np.nan),
+                            index=self.index, columns=self.characters)
+
+    def distribution(self, rows=None):
+        """Respondents per character and answer (among `rows`, a mask or positions)."""
+        positions = self.positions() if rows is None else self.positions()[rows]
+        n_answers = len(self.labels)
+        character = np.broadcast_to(np.arange(len(self.characters)), positions.shape)
+        answered = positions >= 0
+        counts = np.bincount(character[answered] * n_answers + positions[answered],
+                             minlength=len(self.characters) * n_answers)
+        return pd.DataFrame(counts.reshape(len(self.characters), n_answers),
+                            index=self.characters, columns=self.labels)
+
+    def cube(self, segments):
+        """A `FavorabilityCube` of these answers over the cells of a `SegmentCube`."""
+        return FavorabilityCube(self, segments)
+
+    def rank_correlations(self, frame, rank_cols):
+        """Correlation of each character's score with each film ranking (pairwise complete).
+
+        Rankings run from 1 (favorite) to 6, so liking a character and ranking
+        a film highly shows up as a negative correlation.
+        """
+        combined = pd.concat([self.scores(), frame[list(rank_cols)]], axis=1)
+        matrix = Correlator(combined).matrix(self.characters + list(rank_cols))
+        return matrix.loc[self.characters, list(rank_cols)]
+
+
+def _net(counts, codes):
+    """Net favorability: share favorable minus share unfavorable, of those who answered."""
+    codes = codes.astype(np.int64)
+    signs = np.where(np.abs(codes) <= 2, np.sign(codes), 0)
+    total = counts.sum(axis=-1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (counts * signs).sum(axis=-1) / total
+
+
+class FavorabilityCube:
+    """Counts of every (segment cell, character, answer), built with one bincount."""
+
+    def __init__(self, matrix, segments):
+        self.matrix = matrix
+        self.segments = segments
+        n_cells = int(np.prod(segments.shape))
+        n_characters, n_answers = len(matrix.characters), len(matrix.labels)
+
+        positions = matrix.positions()
+        answered = positions >= 0
+        cell = np.broadcast_to(segments.cell[:, None], positions.shape)
+        character = np.broadcast_to(np.arange(n_characters), positions.shape)
+        flat = (cell[answered] * n_characters + character[answered]) * n_answers + positions[answered]
+        counts = np.bincount(flat, minlength=n_cells * n_characters * n_answers)
+        self.counts = counts.reshape(segments.shape + (n_characters, n_answers))
+        self._tables = {}
+
+    def counts_by(self, dims=(), include_missing=False):
+        """Answer counts per segment of `dims`: (segments, characters, answers) and the index."""
+        return self.segments.marginal(self.counts, dims, include_missing)
+
+    def distribution(self, segment):
+        """Respondents per character and answer within one segment."""
+        dims = self.segments.ordered(segment)
+        counts, index = self.counts_by(dims)
+        key = tuple(segment[dim] for dim in dims)
+        row = index.get_loc(key if len(key) > 1 else key[0])
+        return pd.DataFrame(counts[row], index=self.matrix.characters, columns=self.matrix.labels)
+
+    def net(self, dims=()):
+        """Net favorability of every character (columns) per segment of `dims` (rows)."""
+        key = self.segments.ordered(dims)
+        if key not in self._tables:
+            counts, index = self.counts_by(key)
+            net = _net(counts, self.matrix.codes)
+            self._tables[key] = pd.DataFrame(net, index=index, columns=self.matrix.characters)
+        return self._tables[key]
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Loading helpers for freeCodeCamp's New Coder Survey.
+#
+# The survey export has ~136 columns but the market analysis in
+# `advertising_rec.py` only uses a handful of them, so instead of parsing the
+# whole file with inferred object/float64 types we project it down to an
+# explicit schema and read it in chunks.
+
+import os
+import posixpath
+import urllib.parse
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+
+direct_link = 'https://raw.githubusercontent.com/freeCodeCamp/2017-new-coder-survey/master/clean-data/2017-fCC-New-Coders-Survey-Data.csv'
+
+# a url or path to read the survey from instead (a local HTTP stand-in or a
+# file mirror), and the file name a mirror in the working directory goes by
+source_variable = 'FCC_SURVEY_SOURCE'
+mirror_name = posixpath.basename(urllib.parse.urlparse(direct_link).path)
+
+# columns used by the analysis and the narrowest types that hold them
+# (nullable ints because the survey leaves a lot of answers blank)
+fcc_schema = {
+    'JobRoleInterest': 'object',
+    'CountryLive': 'category',
+    'MoneyForLearning': 'float32',
+    'MonthsProgramming': 'Int16',
+    'AttendedBootcamp': 'Int8',
+}
+
+
+def concat_chunks(chunks, schema):
+    """Stack parsed chunks, merging the per-chunk categories of categorical columns."""
+    chunks = list(chunks)
+    if not chunks:
+        return pd.DataFrame({col: pd.Series(dtype=dtype) for col, dtype in schema.items()})
+
+    # each chunk infers its own categories, so concat would fall back to object
+    categorical = [col for col, dtype in schema.items() if dtype == 'category']
+    merged = {col: union_categoricals([chunk[col] for chunk in chunks])
+              for col in categorical}
+
+    frame = pd.concat([chunk.drop(columns=categorical) for chunk in chunks],
+                      ignore_index=True)
+    for col in categorical:
+        frame[col] = pd.Categorical(merged[col])
+
+    # keep the column order of the schema
+    return frame[list(schema)]
+
+
+def survey_source():
+    """$FCC_SURVEY_SOURCE if set, else a mirror in the working directory, else `direct_link`."""
+    source = os.environ.get(source_variable)
+    if source:
+        return source
+    if os.path.exists(mirror_name):
+        return os.path.abspath(mirror_name)
+    return direct_link
+
+
+def load_fcc_survey(path=direct_link, schema=fcc_schema, chunksize=100000):
+    """Read only the `schema` columns of the survey, typed, `chunksize` rows at a time."""
+    reader = pd.read_csv(path, usecols=list(schema), dtype=schema,
+                         chunksize=chunksize)
+    return concat_chunks(reader, schema)
+
+
+def money_per_month(frame):
+    """Money spent on learning divided by months programming (0 months count as 1)."""
+    # divide in float64: float32 / Int16 would round every result to float32
+    months = frame['MonthsProgramming'].replace(0, 1).astype('float64')
+    return frame['MoneyForLearning'].astype('float64') / months
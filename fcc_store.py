@@ -0,0 +1,204 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Append-only store of yearly New Coder Survey aggregates.
+#
+# Each survey year is summarized once into per-country and per-role
+# sufficient statistics of `money_per_month` (count, sum, sum of squares and a
+# mergeable quantile sketch) and written to its own file, which is never
+# rewritten. A running total over all years is updated by adding the new
+# year's statistics, so adding a year never rescans earlier ones, and
+# year-over-year trends are read straight from the per-year files.
+
+import json
+import math
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from fcc_loader import money_per_month
+from job_roles import RoleMatrix
+
+
+class QuantileSketch:
+    """Log-bucketed histogram with `relative_accuracy` error on quantiles; sketches merge by adding."""
+
+    def __init__(self, relative_accuracy=0.01, zero=0, bins=None):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        # values <= 0 (plenty of people spend nothing) go into their own bucket
+        self.zero = zero
+        self.bins = dict(bins or {})
+
+    def add(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        positive = values[values > 0]
+        self.zero += int(len(values) - len(positive))
+        keys, counts = np.unique(np.ceil(np.log(positive) / math.log(self.gamma)).astype(np.int64),
+                                 return_counts=True)
+        for key, count in zip(keys.tolist(), counts.tolist()):
+            self.bins[key] = self.bins.get(key, 0) + count
+        return self
+
+    def merge(self, other):
+        self.zero += other.zero
+        for key, count in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + count
+        return self
+
+    @property
+    def count(self):
+        return self.zero + sum(self.bins.values())
+
+    def quantile(self, q):
+        total = self.count
+        if not total:
+            return np.nan
+        rank = q * (total - 1)
+        if rank < self.zero:
+            return 0.0
+        seen = self.zero
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if seen > rank:
+                # midpoint of the bucket (gamma^(key-1), gamma^key]
+                return 2 * self.gamma ** key / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.bins) / (self.gamma + 1)
+
+    def to_dict(self):
+        return {'relative_accuracy': self.relative_accuracy, 'zero': self.zero,
+                'bins': {str(key): count for key, count in self.bins.items()}}
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d['relative_accuracy'], d['zero'],
+                   {int(key): count for key, count in d['bins'].items()})
+
+
+def _moments(values):
+    return {'count': int(len(values)), 'sum': float(values.sum()),
+            'sumsq': float((values ** 2).sum())}
+
+
+def prepare(frame, max_money=20000):
+    """The respondents the market analysis looks at, with `money_per_month` added."""
+    frame = frame[frame['JobRoleInterest'].notnull()].copy()
+    frame['money_per_month'] = money_per_month(frame)
+    frame = frame[frame['money_per_month'].notnull() & frame['CountryLive'].notnull()]
+    return frame[frame['money_per_month'] < max_money]
+
+
+def summarize(frame, relative_accuracy=0.01):
+    """Per-country and per-role statistics of `money_per_month` for one prepared survey year."""
+    values = frame['money_per_month'].to_numpy(dtype=np.float64)
+    summary = {'country': {}, 'role': {}}
+
+    codes, countries = pd.factorize(frame['CountryLive'])
+    order = np.argsort(codes, kind='stable')
+    bounds = np.cumsum(np.bincount(codes[codes >= 0], minlength=len(countries)))[:-1]
+    for country, group in zip(countries, np.split(values[order][codes[order] >= 0], bounds)):
+        stats = _moments(group)
+        stats['sketch'] = QuantileSketch(relative_accuracy).add(group).to_dict()
+        summary['country'][str(country)] = stats
+
+    roles = RoleMatrix(frame['JobRoleInterest'])
+    dense = roles.dense()
+    role_values = frame['money_per_month'].reindex(roles.index).to_numpy(dtype=np.float64)
+    counts = dense.sum(axis=0)
+    sums = role_values @ dense
+    sumsqs = (role_values ** 2) @ dense
+    for j, role in enumerate(roles.roles):
+        summary['role'][role] = {
+            'count': int(counts[j]), 'sum': float(sums[j]), 'sumsq': float(sumsqs[j]),
+            'sketch': QuantileSketch(relative_accuracy).add(role_values[dense[:, j]]).to_dict(),
+        }
+    return summary
+
+
+def merge_summaries(total, summary):
+    """Add `summary` into `total` in place."""
+    for dimension, groups in summary.items():
+        merged = total.setdefault(dimension, {})
+        for key, stats in groups.items():
+            if key not in merged:
+                merged[key] = json.loads(json.dumps(stats))
+                continue
+            current = merged[key]
+            for field in ('count', 'sum', 'sumsq'):
+                current[field] += stats[field]
+            sketch = QuantileSketch.from_dict(current['sketch'])
+            current['sketch'] = sketch.merge(QuantileSketch.from_dict(stats['sketch'])).to_dict()
+    return total
+
+
+def stats_frame(groups, quantiles=(0.5, 0.9)):
+    """count/mean/std/quantiles table from a {key: statistics} mapping."""
+    rows = {}
+    for key, stats in groups.items():
+        n = stats['count']
+        mean = stats['sum'] / n if n else np.nan
+        var = (stats['sumsq'] - n * mean ** 2) / (n - 1) if n > 1 else np.nan
+        row = {'count': n, 'mean': mean, 'std': math.sqrt(max(var, 0)) if n > 1 else np.nan}
+        sketch = QuantileSketch.from_dict(stats['sketch'])
+        for q in quantiles:
+            row['p{0:g}'.format(q * 100)] = sketch.quantile(q)
+        rows[key] = row
+    return pd.DataFrame.from_dict(rows, orient='index').sort_values('count', ascending=False)
+
+
+class SurveyStore:
+    """Directory of per-year summaries plus a running total over all years."""
+
+    def __init__(self, root='fcc_store'):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, name):
+        return os.path.join(self.root, name + '.json')
+
+    def _read(self, name):
+        with open(self._path(name)) as f:
+            return json.load(f)
+
+    def _write(self, name, data):
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix='.json')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp, self._path(name))
+
+    def years(self):
+        names = [f[len('year_'):-len('.json')] for f in os.listdir(self.root)
+                 if f.startswith('year_') and f.endswith('.json')]
+        return sorted(int(name) for name in names)
+
+    def add_year(self, year, frame, relative_accuracy=0.01):
+        """Summarize one raw survey year (as loaded by `load_fcc_survey`) and fold it into the totals."""
+        if year in self.years():
+            raise ValueError('survey year {0} is already in the store'.format(year))
+
+        summary = summarize(prepare(frame), relative_accuracy)
+        self._write('year_{0}'.format(year), summary)
+
+        total = self._read('total') if os.path.exists(self._path('total')) else {}
+        self._write('total', merge_summaries(total, summary))
+        return summary
+
+    def stats(self, dimension='country', year=None, quantiles=(0.5, 0.9)):
+        """Statistics per country or role for one year, or over every year when `year` is None."""
+        data = self._read('total' if year is None else 'year_{0}'.format(year))
+        return stats_frame(data.get(dimension, {}), quantiles)
+
+    def trend(self, dimension='country', stat='mean', keys=None):
+        """year x key table of `stat` (count, mean, std or a quantile like p50)."""
+        quantiles = ()
+        if stat.startswith('p'):
+            quantiles = (float(stat[1:]) / 100,)
+        table = {year: self.stats(dimension, year, quantiles)[stat] for year in self.years()}
+        trend = pd.DataFrame(table).T
+        trend.index.name = 'year'
+        if keys is not None:
+            trend = trend.reindex(columns=keys)
+        return trend
@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Filling missing values by group, in place.
+#
+# `frame.fillna(frame.mean())` followed by `fillna(0)` builds two full copies
+# of a wide frame to fill a few cells. `impute` works out the fill value of
+# every numeric column for every group in one pass over the rows sorted by
+# group, writes only the missing cells of the columns that have any, and
+# returns a `Missingness` bitmap of the cells it filled so later steps (e.g.
+# `Correlator`) can leave them out.
+
+import warnings
+
+import numpy as np
+import pandas as pd
+
+
+strategies = ('mean', 'median', 'ffill')
+
+
+class Missingness:
+    """Which cells of a frame were missing, one bit per cell."""
+
+    def __init__(self, masks, n_rows):
+        self.columns = pd.Index(list(masks))
+        self.n_rows = n_rows
+        if masks:
+            self.bits = np.packbits(np.column_stack(list(masks.values())), axis=0)
+        else:
+            self.bits = np.zeros((0, 0), dtype=np.uint8)
+
+    def __contains__(self, col):
+        return col in self.columns
+
+    def mask(self, col):
+        """Boolean mask of the missing rows of `col` (all False for unknown columns)."""
+        if col not in self.columns:
+            return np.zeros(self.n_rows, dtype=bool)
+        j = self.columns.get_loc(col)
+        return np.unpackbits(self.bits[:, j], count=self.n_rows).astype(bool)
+
+    def counts(self):
+        """Missing cells per column."""
+        if not len(self.columns):
+            return pd.Series(dtype='int64')
+        unpacked = np.unpackbits(self.bits, axis=0, count=self.n_rows)
+        return pd.Series(unpacked.sum(axis=0, dtype=np.int64), index=self.columns)
+
+    def rows(self):
+        """Rows with at least one missing cell."""
+        if not len(self.columns):
+            return np.zeros(self.n_rows, dtype=bool)
+        return np.unpackbits(np.bitwise_or.reduce(self.bits, axis=1), count=self.n_rows).astype(bool)
+
+
+def _group_codes(frame, by):
+    if by is None:
+        return np.zeros(len(frame), dtype=np.intp), 1
+    # rows with a missing key come back as NaN (or -1): they get code -1
+    codes = frame.groupby(by, sort=False).ngroup().fillna(-1).to_numpy(dtype=np.intp)
+    return codes, int(codes.max()) + 1 if len(codes) else 0
+
+
+def _group_table(x, missing, codes, n_groups, strategy):
+    """The `strategy` statistic of every column per group, as a (groups, columns) array."""
+    order = np.argsort(codes, kind='stable')
+    sorted_codes = codes[order]
+    starts = np.searchsorted(sorted_codes, np.arange(n_groups))
+    present = np.unique(sorted_codes)
+    xs = x[order]
+    ms = missing[order]
+
+    table = np.full((n_groups, x.shape[1]), np.nan)
+    bounds = np.append(starts, len(xs))
+    if strategy == 'mean':
+        sums = np.add.reduceat(np.where(ms, 0.0, xs), starts[present], axis=0)
+        counts = np.add.reduceat(~ms, starts[present], axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            table[present] = sums / counts
+    else:
+        for group in present:
+            with warnings.catch_warnings():
+                # columns with no value in the group stay NaN
+                warnings.simplefilter('ignore', RuntimeWarning)
+                table[group] = np.nanmedian(xs[bounds[group]:bounds[group + 1]], axis=0)
+    return table
+
+
+def _forward_fills(x, missing, codes, n_groups):
+    """For every cell, the last value seen before it in its group (NaN if none)."""
+    order = np.argsort(codes, kind='stable')
+    sorted_codes = codes[order]
+    starts = np.searchsorted(sorted_codes, np.arange(n_groups))
+    xs = x[order]
+    ms = missing[order]
+
+    # position of the last non-missing row so far, reset at group starts
+    last = np.where(ms, -1, np.arange(len(xs))[:, None])
+    last = np.maximum.accumulate(last, axis=0)
+    found = last >= starts[sorted_codes][:, None]
+    fills = np.full(xs.shape, np.nan)
+    cols = np.broadcast_to(np.arange(xs.shape[1]), xs.shape)
+    fills[found] = xs[last[found], cols[found]]
+    out = np.empty_like(fills)
+    out[order] = fills
+    return out
+
+
+def impute(frame, columns=None, strategy='mean', by=None, fallback=0):
+    """Fill the missing values of `frame` in place.
+
+    Numeric `columns` (default: all numeric columns except `by`) are filled
+    with the `strategy` ('mean', 'median' or 'ffill', in row order) of their
+    group in `by` (a column or list of columns; default: the whole frame).
+    Cells still missing get the column's overall statistic and then
+    `fallback`; other columns with missing values get `fallback` directly.
+    Only the missing cells are written. Returns the `Missingness` of every
+    column that had missing values.
+    """
+    if strategy not in strategies:
+        raise ValueError('strategy must be one of {0}'.format(', '.join(strategies)))
+    keys = [] if by is None else ([by] if isinstance(by, str) else list(by))
+    if columns is None:
+        columns = [col for col in frame.select_dtypes(include='number').columns
+                   if col not in keys]
+    columns = list(columns)
+
+    # only columns with gaps are read, and only their missing cells written
+    gaps = frame[columns].isna().any() if columns else pd.Series(dtype=bool)
+    todo = [col for col in columns if gaps[col]]
+    masks = {}
+    if todo:
+        x = frame[todo].to_numpy(dtype=np.float64)
+        missing = np.isnan(x)
+        codes, n_groups = _group_codes(frame, by)
+        # rows with a missing group key have no group of their own
+        keyed = codes >= 0
+        if strategy == 'ffill':
+            forward = np.full(x.shape, np.nan)
+            if n_groups:
+                forward[keyed] = _forward_fills(x[keyed], missing[keyed], codes[keyed], n_groups)
+        else:
+            table = np.full((n_groups, len(todo)), np.nan)
+            if n_groups:
+                table = _group_table(x[keyed], missing[keyed], codes[keyed], n_groups, strategy)
+            overall = (_group_table(x, missing, np.zeros(len(x), dtype=np.intp), 1, strategy)[0]
+                       if by is not None else np.full(len(todo), np.nan))
+
+        for j, col in enumerate(todo):
+            rows = np.flatnonzero(missing[:, j])
+            if strategy == 'ffill':
+                values = forward[rows, j]
+            else:
+                values = np.where(keyed[rows], table[np.maximum(codes[rows], 0), j], np.nan)
+                values = np.where(np.isnan(values), overall[j], values)
+            values = np.where(np.isnan(values), fallback, values)
+            loc = frame.columns.get_loc(col)
+            dtype = frame.dtypes.iloc[loc]
+            if isinstance(dtype, np.dtype):
+                values = values.astype(dtype, copy=False)
+            else:
+                values = pd.array(values).astype(dtype)
+            frame.iloc[rows, loc] = values
+            masks[col] = missing[:, j]
+
+    for col in frame.columns:
+        if col in masks or col in columns:
+            continue
+        mask = frame[col].isna().to_numpy()
+        if mask.any():
+            try:
+                frame.iloc[np.flatnonzero(mask), frame.columns.get_loc(col)] = fallback
+            except (TypeError, ValueError):
+                # a dtype that can't hold `fallback` (e.g. `str` for 0) has to be recast
+                frame[col] = frame[col].fillna(fallback)
+            masks[col] = mask
+    return Missingness(masks, len(frame))
@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Multi-label view of the survey's `JobRoleInterest` answers.
+#
+# Respondents tick several roles, which the survey stores as one comma
+# separated string. Instead of splitting and regex-scanning those strings for
+# every question, we parse them once into a bit-packed respondent x role
+# indicator matrix over a normalized role vocabulary. Counts, filters,
+# co-occurrence and per-group shares are then array operations.
+
+import numpy as np
+import pandas as pd
+
+
+# number of set bits in every possible byte
+_popcount = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1)
+
+
+def normalize_roles(labels):
+    """Strip and collapse whitespace so ' Front-End  Web Developer' matches 'Front-End Web Developer'."""
+    return labels.str.strip().str.replace(r'\s+', ' ', regex=True)
+
+
+class RoleMatrix:
+    """Bit-packed respondent x role indicators built from one pass over the raw strings."""
+
+    def __init__(self, interests, sep=',', min_count=1, other='Other'):
+        interests = interests.dropna()
+        self.index = interests.index
+
+        # one row per (respondent position, role) pair
+        exploded = interests.reset_index(drop=True).str.split(sep).explode()
+        labels = normalize_roles(exploded.dropna())
+        labels = labels[labels != '']
+        rows = labels.index.to_numpy()
+
+        # rare free-text answers are folded into a single bucket
+        counts = labels.value_counts()
+        rare = counts.index[counts < min_count]
+        if len(rare):
+            labels = labels.where(~labels.isin(rare), other)
+            counts = labels.value_counts()
+
+        # vocabulary ordered by popularity
+        self.roles = pd.Index(counts.index, name='role')
+        cols = self.roles.get_indexer(labels)
+
+        dense = np.zeros((len(self.index), len(self.roles)), dtype=bool)
+        dense[rows, cols] = True # repeated roles in one answer collapse here
+        self.packed = np.packbits(dense, axis=1)
+
+    def __len__(self):
+        return len(self.index)
+
+    def dense(self):
+        """Unpacked boolean indicator matrix."""
+        return np.unpackbits(self.packed, axis=1, count=len(self.roles)).astype(bool)
+
+    def frame(self):
+        return pd.DataFrame(self.dense(), index=self.index, columns=self.roles)
+
+    def matching(self, pattern):
+        """Roles whose name matches the regex `pattern` (scans the vocabulary, not the rows)."""
+        return list(self.roles[self.roles.str.contains(pattern)])
+
+    def _query(self, roles):
+        missing = [role for role in roles if role not in self.roles]
+        if missing:
+            raise KeyError('unknown roles: {0}'.format(missing))
+        bits = np.zeros(len(self.roles), dtype=bool)
+        bits[self.roles.get_indexer(roles)] = True
+        return np.packbits(bits)
+
+    def n_options(self):
+        """Number of roles each respondent picked."""
+        counts = _popcount[self.packed].sum(axis=1)
+        return pd.Series(counts, index=self.index, name='n_options')
+
+    def any_of(self, roles):
+        """True for respondents interested in at least one of `roles`."""
+        hits = (self.packed & self._query(roles)).any(axis=1)
+        return pd.Series(hits, index=self.index)
+
+    def all_of(self, roles):
+        """True for respondents interested in every one of `roles`."""
+        query = self._query(roles)
+        hits = ((self.packed & query) == query).all(axis=1)
+        return pd.Series(hits, index=self.index)
+
+    def role_counts(self, normalize=False):
+        counts = pd.Series(self.dense().sum(axis=0), index=self.roles)
+        if normalize:
+            return counts / len(self)
+        return counts
+
+    def cooccurrence(self):
+        """Role x role counts of respondents picking both (diagonal is the role count)."""
+        dense = self.dense().astype(np.int32)
+        return pd.DataFrame(dense.T @ dense, index=self.roles, columns=self.roles)
+
+    def shares_by(self, groups):
+        """Share of respondents in each group interested in each role, e.g. per `CountryLive`."""
+        groups = groups.reindex(self.index)
+        shares = self.frame().groupby(groups, observed=True, sort=False).mean()
+        shares.index.name = groups.name
+        return shares
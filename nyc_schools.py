@@ -7,24 +7,17 @@
 
 
 import pandas as pd
-import numpy
-import re
-import matplotlib.pyplot as plt
-
-data_files = [
-    "ap_2010.csv",
-    "class_size.csv",
-    "demographics.csv",
-    "graduation.csv",
-    "hs_directory.csv",
-    "sat_results.csv"
-]
-
-data = {}
+from plotting import plt, inline
+from schools_loader import load_schools, survey_columns
+from schools_features import build_dbn, coordinates, pad_csd, school_district
+from schools_panel import combine, run_panel, select_slice
+from correlations import Correlator
+from school_index import SchoolIndex
+from compaction import compact
 
-for f in data_files:
-    d = pd.read_csv("schools/{0}".format(f))
-    data[f.replace(".csv", "")] = d
+# read every file at once (cached after the first run), keeping only the
+# survey questions we need from the two survey files
+data = load_schools("schools")
 
 
 # # Read in the surveys
@@ -32,37 +25,13 @@ for f in data_files:
 # In[32]:
 
 
-all_survey = pd.read_csv("schools/survey_all.txt", delimiter="\t", encoding='windows-1252')
-d75_survey = pd.read_csv("schools/survey_d75.txt", delimiter="\t", encoding='windows-1252')
+all_survey = data.pop("survey_all")
+d75_survey = data.pop("survey_d75")
 survey = pd.concat([all_survey, d75_survey], axis=0)
 
 survey["DBN"] = survey["dbn"]
 
-survey_fields = [
-    "DBN", 
-    "rr_s", 
-    "rr_t", 
-    "rr_p", 
-    "N_s", 
-    "N_t", 
-    "N_p", 
-    "saf_p_11", 
-    "com_p_11", 
-    "eng_p_11", 
-    "aca_p_11", 
-    "saf_t_11", 
-    "com_t_11", 
-    "eng_t_11", 
-    "aca_t_11", 
-    "saf_s_11", 
-    "com_s_11", 
-    "eng_s_11", 
-    "aca_s_11", 
-    "saf_tot_11", 
-    "com_tot_11", 
-    "eng_tot_11", 
-    "aca_tot_11",
-]
+survey_fields = ["DBN"] + list(survey_columns)
 survey = survey.loc[:,survey_fields]
 data["survey"] = survey
 
@@ -74,15 +43,8 @@ data["survey"] = survey
 
 data["hs_directory"]["DBN"] = data["hs_directory"]["dbn"]
 
-def pad_csd(num):
-    string_representation = str(num)
-    if len(string_representation) > 1:
-        return string_representation
-    else:
-        return "0" + string_representation
-    
-data["class_size"]["padded_csd"] = data["class_size"]["CSD"].apply(pad_csd)
-data["class_size"]["DBN"] = data["class_size"]["padded_csd"] + data["class_size"]["SCHOOL CODE"]
+data["class_size"]["padded_csd"] = pad_csd(data["class_size"]["CSD"])
+data["class_size"]["DBN"] = build_dbn(data["class_size"]["CSD"], data["class_size"]["SCHOOL CODE"])
 
 
 # # Convert columns to numeric
@@ -96,21 +58,10 @@ for c in cols:
 
 data['sat_results']['sat_score'] = data['sat_results'][cols[0]] + data['sat_results'][cols[1]] + data['sat_results'][cols[2]]
 
-def find_lat(loc):
-    coords = re.findall("\(.+, .+\)", loc)
-    lat = coords[0].split(",")[0].replace("(", "")
-    return lat
-
-def find_lon(loc):
-    coords = re.findall("\(.+, .+\)", loc)
-    lon = coords[0].split(",")[1].replace(")", "").strip()
-    return lon
-
-data["hs_directory"]["lat"] = data["hs_directory"]["Location 1"].apply(find_lat)
-data["hs_directory"]["lon"] = data["hs_directory"]["Location 1"].apply(find_lon)
-
-data["hs_directory"]["lat"] = pd.to_numeric(data["hs_directory"]["lat"], errors="coerce")
-data["hs_directory"]["lon"] = pd.to_numeric(data["hs_directory"]["lon"], errors="coerce")
+# parse the coordinates out of "Location 1" once, straight to floats
+coords = coordinates(data["hs_directory"]["Location 1"])
+data["hs_directory"]["lat"] = coords["lat"]
+data["hs_directory"]["lon"] = coords["lon"]
 
 
 # # Condense datasets
@@ -122,14 +73,13 @@ class_size = data["class_size"]
 class_size = class_size[class_size["GRADE "] == "09-12"]
 class_size = class_size[class_size["PROGRAM TYPE"] == "GEN ED"]
 
-class_size = class_size.groupby("DBN").agg(numpy.mean)
+class_size = class_size.groupby("DBN").mean(numeric_only=True)
 class_size.reset_index(inplace=True)
 data["class_size"] = class_size
 
-data["demographics"] = data["demographics"][data["demographics"]["schoolyear"] == 20112012]
-
-data["graduation"] = data["graduation"][data["graduation"]["Cohort"] == "2006"]
-data["graduation"] = data["graduation"][data["graduation"]["Demographic"] == "Total Cohort"]
+# demographics and graduation keep every year in `data`; the analysis below
+# uses the 2011-2012 school year and the 2006 cohort
+year_data = select_slice(data, 20112012, "2006")
 
 
 # # Convert AP scores to numeric
@@ -148,18 +98,16 @@ for col in cols:
 # In[37]:
 
 
-combined = data["sat_results"]
+to_merge = [("ap_2010", "left"), ("graduation", "left"),
+            ("class_size", "inner"), ("demographics", "inner"),
+            ("survey", "inner"), ("hs_directory", "inner")]
 
-combined = combined.merge(data["ap_2010"], on="DBN", how="left")
-combined = combined.merge(data["graduation"], on="DBN", how="left")
-
-to_merge = ["class_size", "demographics", "survey", "hs_directory"]
-
-for m in to_merge:
-    combined = combined.merge(data[m], on="DBN", how="inner")
-
-combined = combined.fillna(combined.mean())
-combined = combined.fillna(0)
+# join everything onto the SAT results in one pass, with a report of the
+# keys each table duplicated or lost, then fill the gaps with column means;
+# `imputed` remembers which cells were filled
+combined, join_report, imputed = combine(year_data, to_merge)
+print(join_report)
+print(imputed.counts().sort_values(ascending=False).head(10))
 
 
 # # Add a school district column for mapping
@@ -167,10 +115,12 @@ combined = combined.fillna(0)
 # In[38]:
 
 
-def get_first_two_chars(dbn):
-    return dbn[0:2]
+combined["school_dist"] = school_district(combined["DBN"])
 
-combined["school_dist"] = combined["DBN"].apply(get_first_two_chars)
+# narrow the numeric columns and store repeated strings (boroughs, districts)
+# as categoricals
+combined, footprint = compact(combined, categories=["boro", "school_dist"])
+print(footprint.loc["total"])
 
 
 # # Find correlations
@@ -178,10 +128,15 @@ combined["school_dist"] = combined["DBN"].apply(get_first_two_chars)
 # In[39]:
 
 
-correlations = combined.corr()
-correlations = correlations["sat_score"]
+# Every correlation below is against `sat_score`, so only that column of the
+# matrix is computed; the column means and deviations are reused between cells.
+correlator = Correlator(combined, imputed)
+correlations = correlator.with_target("sat_score")
 print(correlations)
 
+# the same correlations using only the values the schools actually reported
+print(correlator.with_target("sat_score", exclude_imputed=True))
+
 
 # # Plotting survey correlations
 
@@ -195,9 +150,9 @@ survey_fields.remove("DBN")
 # In[42]:
 
 
-get_ipython().run_line_magic('matplotlib', 'inline')
+inline()
 
-combined.corr()['sat_score'][survey_fields].plot.bar()
+correlator.with_target('sat_score', survey_fields).plot.bar()
 
 
 # The columns `N_s`, `N_t` and `N_p` all have relatively high correlations to `sat_score`. These columns represent the number of students, teacher and parents that responded to the survey. It makes sense to me that students that responded to the survey had better sat scores as you could infer students that responded to the survey are also more likely to put more time into their studies.
@@ -219,7 +174,7 @@ plt.show()
 # In[49]:
 
 
-boros = combined.groupby('boro').agg(numpy.mean)['saf_s_11']
+boros = combined.groupby('boro', observed=True)['saf_s_11'].mean().sort_index()
 print(boros)
 
 
@@ -237,7 +192,7 @@ race_fields = [
     'hispanic_per'
 ]
 
-combined.corr()['sat_score'][race_fields].plot.bar()
+correlator.with_target('sat_score', race_fields).plot.bar()
 
 
 # It appears that a higher percentage of white or asian students at a school correlates to higher SAT scores. Inversely, a higher percentage of black and hispanic students at a school correlates negatively with SAT scores.
@@ -272,7 +227,7 @@ print(combined[(combined['hispanic_per'] < 10) & (combined['sat_score'] > 1800)]
 
 
 genders = ['male_per', 'female_per']
-combined.corr()['sat_score'][genders].plot.bar()
+correlator.with_target('sat_score', genders).plot.bar()
 
 
 # It appears that schools with a higher percentage of females have a slightly positive correlation to SAT scores, and schools with a high percentage of males had a slightly negative correlation to SAT scores.
@@ -288,3 +243,40 @@ combined.plot.scatter('female_per','sat_score')
 
 print(combined[(combined['female_per'] > 60) & (combined['sat_score'] > 1700)]['SCHOOL NAME'])
 
+
+
+# # Schools near each other
+
+# In[72]:
+
+
+# `combined` has had its missing coordinates filled with the mean, so index the
+# original hs_directory coordinates of the schools in `combined` instead.
+locations = data["hs_directory"].drop_duplicates("DBN").set_index("DBN")[["lat", "lon"]]
+locations = locations.reindex(combined["DBN"]).set_index(combined.index)
+locations["school_dist"] = combined["school_dist"]
+school_index = SchoolIndex.from_frame(locations, district="school_dist")
+
+# the five schools closest to the school with the highest SAT score
+best = combined["sat_score"].idxmax()
+print(combined.loc[best, "SCHOOL NAME"])
+nearby = school_index.nearest(locations.loc[best, "lat"], locations.loc[best, "lon"], k=6)
+print(combined.loc[nearby.index, ["SCHOOL NAME", "sat_score"]].assign(km=nearby))
+
+
+# In[73]:
+
+
+district_scores = school_index.district_stats(combined[["sat_score"] + survey_fields], stats=("mean",))
+print(district_scores.sort_values(("sat_score", "mean"), ascending=False).head())
+
+
+# # Every school year
+
+# In[74]:
+
+
+# The same merge and correlations for each school year (paired with the cohort
+# that started five years earlier), one worker process per year.
+panel, panel_correlations = run_panel(data, to_merge)
+print(panel_correlations[survey_fields + race_fields + genders])
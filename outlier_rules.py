@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Declarative outlier removal.
+#
+# A rule is a name plus a list of (column, op, value) conditions that must all
+# hold for a row to be dropped, e.g.
+#
+#     {'name': 'india', 'conditions': [('CountryLive', '==', 'India'),
+#                                      ('money_per_month', '>=', 2500)]}
+#
+# All rules are evaluated together into one keep-mask instead of building a
+# filtered frame and calling `.drop` for each of them. Condition masks are
+# cached by (column, op, value), so rules and scenarios that share conditions
+# only pay for them once.
+
+import operator
+
+import numpy as np
+import pandas as pd
+
+
+_ops = {
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    'in': lambda col, values: col.isin(values),
+}
+
+
+class RuleEngine:
+    """Evaluates outlier rules against one frame, reusing condition masks between calls."""
+
+    def __init__(self, frame):
+        self.frame = frame
+        self._masks = {}
+
+    def condition(self, column, op, value):
+        key = (column, op, tuple(value) if op == 'in' else value)
+        if key not in self._masks:
+            if op not in _ops:
+                raise ValueError('unknown operator {0!r}'.format(op))
+            hit = _ops[op](self.frame[column], value)
+            # missing values never match a condition
+            self._masks[key] = np.asarray(hit.fillna(False), dtype=bool)
+        return self._masks[key]
+
+    def matches(self, rules):
+        """rules x rows boolean matrix of the rows each rule would drop."""
+        hits = np.ones((len(rules), len(self.frame)), dtype=bool)
+        for i, rule in enumerate(rules):
+            for column, op, value in rule['conditions']:
+                hits[i] &= self.condition(column, op, value)
+        return hits
+
+    def evaluate(self, rules):
+        """Return the keep-mask and a per-rule audit of matched and removed rows.
+
+        Rows hit by several rules are attributed to the first one, which is
+        what dropping them rule by rule would report.
+        """
+        hits = self.matches(rules)
+        dropped = hits.any(axis=0)
+
+        first = hits.argmax(axis=0)
+        removed = np.bincount(first[dropped], minlength=len(rules))
+        audit = pd.DataFrame({
+            'matched': hits.sum(axis=1),
+            'removed': removed,
+        }, index=pd.Index([rule['name'] for rule in rules], name='rule'))
+
+        return pd.Series(~dropped, index=self.frame.index), audit
+
+    def sweep(self, scenarios, value=None, by=None):
+        """Evaluate many rule sets (name -> rules) at once.
+
+        Returns the rows kept per scenario and, when `value` and `by` are
+        given, the mean of `value` per `by` group after each scenario.
+        """
+        names = list(scenarios)
+        keep = np.stack([~self.matches(scenarios[name]).any(axis=0) for name in names])
+        kept = pd.Series(keep.sum(axis=1), index=pd.Index(names, name='scenario'),
+                         name='kept')
+        if value is None or by is None:
+            return kept
+
+        codes, groups = pd.factorize(self.frame[by], sort=True)
+        values = np.asarray(self.frame[value], dtype=np.float64)
+        valid = (codes >= 0) & ~np.isnan(values)
+        codes = codes[valid]
+        values = values[valid]
+
+        means = np.empty((len(names), len(groups)))
+        for i, row in enumerate(keep[:, valid]):
+            sums = np.bincount(codes, weights=values * row, minlength=len(groups))
+            counts = np.bincount(codes, weights=row, minlength=len(groups))
+            with np.errstate(invalid='ignore', divide='ignore'):
+                means[i] = sums / counts
+        return pd.DataFrame(means, index=kept.index, columns=pd.Index(groups, name=by))
+
+
+def apply_rules(frame, rules):
+    """Drop the rows matched by any of `rules` in one pass; returns the kept frame and the audit."""
+    keep, audit = RuleEngine(frame).evaluate(rules)
+    return frame[keep], audit
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Lazy plotting imports for the analysis scripts.
+#
+# The scripts use `plt` and `sns` from here instead of importing matplotlib
+# and seaborn at the top. Nothing is imported until a plotting function is
+# actually used, and after `disable()` every plotting call (including pandas'
+# `.plot` accessor) is a no-op, so a headless run that only wants the numbers
+# never loads the plotting stack. With `save_to(directory)` figures are
+# rendered off-screen and written to files instead of shown.
+
+import builtins
+import importlib
+import os
+import sys
+
+
+enabled = True
+figure_dir = None
+_figure_count = 0
+_prefix = 'figure'
+
+
+class _NoOp:
+    """Stands in for any plotting object when plotting is disabled."""
+
+    def __call__(self, *args, **kwargs):
+        return self
+
+    def __getattr__(self, name):
+        return self
+
+    def __getitem__(self, key):
+        return self
+
+
+_noop = _NoOp()
+
+
+def _subplots(*args, **kwargs):
+    # the only call the scripts unpack
+    return _noop, _noop
+
+
+class _LazyModule:
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        if not enabled:
+            return _subplots if attr == 'subplots' else _noop
+        if attr == 'show' and figure_dir is not None:
+            return save_figures
+        return getattr(self._load(), attr)
+
+
+plt = _LazyModule('matplotlib.pyplot')
+sns = _LazyModule('seaborn')
+
+
+def plot(data, kind=None, **kwargs):
+    """pandas plotting backend entry point used while plotting is disabled."""
+    return _noop
+
+
+def disable():
+    """Turn every plotting call into a no-op, pandas' `.plot` included."""
+    global enabled
+    enabled = False
+    import pandas as pd
+    pd.set_option('plotting.backend', __name__)
+
+
+def save_to(directory, prefix='figure'):
+    """Render off-screen and write figures to `directory` instead of showing them."""
+    global figure_dir, _prefix, _figure_count
+    figure_dir = directory
+    _prefix = prefix
+    _figure_count = 0
+    os.makedirs(directory, exist_ok=True)
+    # picked up whenever matplotlib gets imported, by us or by pandas
+    os.environ['MPLBACKEND'] = 'Agg'
+
+
+def save_figures(*args, **kwargs):
+    """Write every open figure to `figure_dir` and close it (stands in for `plt.show`)."""
+    global _figure_count
+    if figure_dir is None or 'matplotlib.pyplot' not in sys.modules:
+        return
+    pyplot = sys.modules['matplotlib.pyplot']
+    for number in pyplot.get_fignums():
+        _figure_count += 1
+        path = os.path.join(figure_dir, '{0}_{1:02d}.png'.format(_prefix, _figure_count))
+        pyplot.figure(number).savefig(path, bbox_inches='tight')
+    pyplot.close('all')
+
+
+def inline():
+    """`%matplotlib inline` when running inside IPython/Jupyter, nothing otherwise."""
+    if not enabled:
+        return
+    # IPython puts get_ipython into builtins
+    get_ipython = getattr(builtins, 'get_ipython', None)
+    ipython = get_ipython() if get_ipython is not None else None
+    if ipython is not None:
+        ipython.run_line_magic('matplotlib', 'inline')
@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Combining many respondents' film rankings into one ordering.
+#
+# Everything starts from the pairwise preference matrix: P[i, j] is the number
+# of respondents who ranked film i ahead of film j. It is built by comparing
+# the respondent x film rank array with itself (in row blocks, so memory stays
+# bounded), and a comparison involving a missing rank is simply false, so
+# partial rankings only count for the pairs they actually rank.
+#
+# From P: Borda points (films ranked below, summed over respondents),
+# Copeland scores (pairwise wins minus losses), the Condorcet winner if there
+# is one, and the Kemeny ordering (the one agreeing with the most pairwise
+# preferences), exact for a handful of films and by local search beyond that.
+
+import itertools
+import warnings
+
+import numpy as np
+import pandas as pd
+
+
+def preference_matrix(ranks, unranked='ignore', block=100000):
+    """P[i, j] = respondents ranking column i ahead of column j (lower rank = preferred).
+
+    `unranked='bottom'` counts every ranked film as preferred to the films a
+    respondent left unranked; the default ignores those pairs.
+    """
+    ranks = np.asarray(ranks, dtype=np.float64)
+    if unranked == 'bottom':
+        ranks = np.where(np.isnan(ranks), np.inf, ranks)
+    elif unranked != 'ignore':
+        raise ValueError("unranked must be 'ignore' or 'bottom'")
+    m = ranks.shape[1]
+    counts = np.zeros((m, m), dtype=np.int64)
+    for start in range(0, len(ranks), block):
+        chunk = ranks[start:start + block]
+        counts += (chunk[:, :, None] < chunk[:, None, :]).sum(axis=0)
+    return counts
+
+
+def agreement(order, pairwise):
+    """Pairwise preferences an ordering (film positions, best first) agrees with."""
+    order = np.asarray(order)
+    before = np.triu(np.ones((len(order), len(order)), dtype=bool), 1)
+    return int(pairwise[np.ix_(order, order)][before].sum())
+
+
+def kemeny(pairwise, exact_limit=8, start=None):
+    """Ordering (best first) that agrees with the most pairwise preferences.
+
+    Up to `exact_limit` films every permutation is scored at once; beyond that
+    the ordering is improved from `start` (default: by Borda points) by
+    moving single films while that gains agreement.
+    """
+    pairwise = np.asarray(pairwise)
+    m = len(pairwise)
+    if m <= exact_limit:
+        perms = np.array(list(itertools.permutations(range(m))))
+        positions = np.argsort(perms, axis=1)
+        ahead = positions[:, :, None] < positions[:, None, :]
+        scores = (ahead * pairwise).sum(axis=(1, 2))
+        return list(perms[np.argmax(scores)])
+
+    order = list(np.argsort(-pairwise.sum(axis=1), kind='stable') if start is None else start)
+    best = agreement(order, pairwise)
+    improved = True
+    while improved:
+        improved = False
+        for item in range(m):
+            rest = [film for film in order if film != item]
+            for position in range(m):
+                candidate = rest[:position] + [item] + rest[position:]
+                score = agreement(candidate, pairwise)
+                if score > best:
+                    order, best, improved = candidate, score, True
+    return order
+
+
+class RankAggregate:
+    """Consensus orderings of the columns of a respondent x film rank array."""
+
+    def __init__(self, ranks, labels=None, unranked='ignore'):
+        ranks = np.asarray(ranks, dtype=np.float64)
+        self.labels = list(labels) if labels is not None else list(range(ranks.shape[1]))
+        self.respondents = int((~np.isnan(ranks)).any(axis=1).sum())
+        with warnings.catch_warnings():
+            # films nobody ranked get a NaN mean
+            warnings.simplefilter('ignore', RuntimeWarning)
+            self.mean_rank = np.nanmean(ranks, axis=0)
+        self.pairwise = preference_matrix(ranks, unranked=unranked)
+
+    @classmethod
+    def from_frame(cls, frame, columns, unranked='ignore'):
+        return cls(frame[list(columns)], labels=columns, unranked=unranked)
+
+    def preferences(self):
+        """The pairwise matrix as a frame: rows preferred over columns."""
+        return pd.DataFrame(self.pairwise, index=self.labels, columns=self.labels)
+
+    def borda(self):
+        return pd.Series(self.pairwise.sum(axis=1), index=self.labels, name='borda')
+
+    def copeland(self):
+        wins = np.sign(self.pairwise - self.pairwise.T).sum(axis=1)
+        return pd.Series(wins, index=self.labels, name='copeland')
+
+    def condorcet_winner(self):
+        """The film preferred to every other film by a majority of pairs, or None."""
+        beats = self.pairwise > self.pairwise.T
+        np.fill_diagonal(beats, True)
+        winners = np.flatnonzero(beats.all(axis=1))
+        return self.labels[winners[0]] if len(winners) else None
+
+    def kemeny(self):
+        """Kemeny ordering of the labels, best first."""
+        return [self.labels[film] for film in kemeny(self.pairwise)]
+
+    def summary(self):
+        """Mean rank, Borda and Copeland scores and Kemeny position of every film."""
+        position = {label: i + 1 for i, label in enumerate(self.kemeny())}
+        table = pd.DataFrame({
+            'mean_rank': self.mean_rank,
+            'borda': self.borda(),
+            'copeland': self.copeland(),
+            'kemeny': pd.Series(position),
+        }, index=self.labels)
+        return table.sort_values('kemeny')
@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Headless batch runner for the analysis scripts.
+#
+#     python run_analyses.py                     # all four, figures saved to ./figures
+#     python run_analyses.py --no-plots          # only the tables, as JSON on stdout
+#     python run_analyses.py nyc_schools --no-plots --output results
+#     python run_analyses.py advertising_rec --fcc-source http://localhost:8000/survey.csv
+#
+# Scripts run as plain Python (no IPython needed). Their own printing goes to
+# stderr so stdout only carries the machine-readable tables. With
+# `--no-plots` matplotlib and seaborn are never imported. The fCC survey is
+# read from `--fcc-source` if given, else from a copy of the csv in the data
+# directory, else downloaded.
+
+import argparse
+import contextlib
+import json
+import os
+import runpy
+import sys
+
+import plotting
+
+
+here = os.path.dirname(os.path.abspath(__file__))
+
+# tables each analysis produces, by the name the script gives them; the
+# working frames (the cleaned survey, `combined`, the stacked `panel`, ...)
+# are left out on purpose, only results are reported
+analyses = {
+    'advertising_rec': [
+        'absolute_frequencies', 'relative_frequencies', 'freq_table',
+        'countries_mean', 'outlier_audit', 'spend_ci', 'markets', 'best_pairs', 'best_triples',
+    ],
+    'nyc_schools': [
+        'join_report', 'footprint', 'correlations', 'boros', 'nearby', 'district_scores',
+        'panel_correlations',
+    ],
+    'starwars_survey': [
+        'movie_rank_cols', 'consensus_summary', 'coviewing', 'film_triples',
+        'gender_comparison', 'gender_tests', 'favorability_counts', 'net_favorability',
+        'character_rank_correlations',
+    ],
+    'traffic_indicators_i94': [
+        'by_month', 'by_day_of_week', 'by_hour_business', 'by_hour_weekend',
+        'window_stats', 'by_weather_main',
+    ],
+}
+
+
+def to_json(value):
+    """JSON-ready form of a pandas object (split orientation) or a plain value."""
+    if hasattr(value, 'to_json'):
+        return json.loads(value.to_json(orient='split', default_handler=str))
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    return value
+
+
+def run(name, data_dir=None):
+    """Run one analysis script and return its global namespace."""
+    path = os.path.join(here, name + '.py')
+    cwd = os.getcwd()
+    if data_dir is not None:
+        os.chdir(data_dir)
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            namespace = runpy.run_path(path, run_name='__main__')
+            plotting.save_figures()
+    finally:
+        os.chdir(cwd)
+    return namespace
+
+
+def tables(name, namespace):
+    return {table: to_json(namespace[table])
+            for table in analyses[name] if table in namespace}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the analyses without a notebook.')
+    parser.add_argument('names', nargs='*',
+                        help='analyses to run: {0} (default: all)'.format(', '.join(sorted(analyses))))
+    parser.add_argument('--no-plots', action='store_true',
+                        help="don't import or render any plotting library")
+    parser.add_argument('--figures', default='figures',
+                        help='directory for rendered figures (default: %(default)s)')
+    parser.add_argument('--data-dir', default=None,
+                        help='directory the scripts read their data files from')
+    parser.add_argument('--fcc-source', default=None,
+                        help='url or path of the fCC survey csv (a local HTTP stand-in or mirror)')
+    parser.add_argument('--output', default=None,
+                        help='write one <analysis>.json per analysis here instead of stdout')
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.names if name not in analyses]
+    if unknown:
+        parser.error('unknown analyses: {0}'.format(', '.join(unknown)))
+
+    if here not in sys.path:
+        sys.path.insert(0, here)
+    if args.no_plots:
+        plotting.disable()
+    if args.fcc_source is not None:
+        from fcc_loader import source_variable
+        source = args.fcc_source
+        if '://' not in source:
+            # the scripts run from the data directory
+            source = os.path.abspath(source)
+        os.environ[source_variable] = source
+
+    results = {}
+    for name in args.names or sorted(analyses):
+        if not args.no_plots:
+            plotting.save_to(os.path.abspath(args.figures), prefix=name)
+        results[name] = tables(name, run(name, args.data_dir))
+
+    if args.output is None:
+        json.dump(results, sys.stdout, indent=1)
+        sys.stdout.write('\n')
+    else:
+        os.makedirs(args.output, exist_ok=True)
+        for name, result in results.items():
+            with open(os.path.join(args.output, name + '.json'), 'w') as f:
+                json.dump(result, f, indent=1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Spatial index over school coordinates.
+#
+# Schools are bucketed into a grid of roughly square cells (`cell_km` on a
+# side) and laid out cell by cell, so a box, radius or nearest-school query
+# only measures the distance to schools in the handful of cells around the
+# query point instead of every school in the directory. District statistics
+# go through a `CountryIndex` over the district column, which works for any
+# categorical column.
+
+import numpy as np
+import pandas as pd
+
+from country_index import CountryIndex
+
+
+earth_radius_km = 6371.0088
+km_per_degree = np.pi * earth_radius_km / 180
+
+
+def haversine(lat, lon, lats, lons):
+    """Great-circle distance in km from one point to arrays of points."""
+    lat, lon, lats, lons = map(np.radians, (lat, lon, lats, lons))
+    a = (np.sin((lats - lat) / 2) ** 2
+         + np.cos(lat) * np.cos(lats) * np.sin((lons - lon) / 2) ** 2)
+    return 2 * earth_radius_km * np.arcsin(np.sqrt(a))
+
+
+class SchoolIndex:
+    """Grid index over `lat`/`lon` Series; results are labelled by their index."""
+
+    def __init__(self, lat, lon, district=None, cell_km=2.0):
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        located = ~(np.isnan(lat) | np.isnan(lon))
+        self.labels = pd.RangeIndex(len(lat))
+        self._located = np.flatnonzero(located)
+
+        self.lat0 = lat[located].min() if located.any() else 0.0
+        self.lon0 = lon[located].min() if located.any() else 0.0
+        mid = np.radians(np.median(lat[located])) if located.any() else 0.0
+        self.dlat = cell_km / km_per_degree
+        self.dlon = cell_km / (km_per_degree * max(np.cos(mid), 1e-6))
+        # the narrowest a cell gets, for bounding distances in nearest()
+        widest = np.radians(np.abs(lat[located]).max()) if located.any() else 0.0
+        self.min_cell_km = min(cell_km, self.dlon * km_per_degree * np.cos(widest))
+
+        rows, cols = self._cell(lat[located], lon[located])
+        self.n_rows = int(rows.max()) + 1 if len(rows) else 0
+        self.n_cols = int(cols.max()) + 1 if len(cols) else 0
+        keys = rows * self.n_cols + cols
+        order = np.argsort(keys, kind='stable')
+        self.keys = keys[order]
+        self.positions = self._located[order]
+        self.lat = lat
+        self.lon = lon
+
+        self.district = None
+        if district is not None:
+            self.district = CountryIndex(district)
+
+    @classmethod
+    def from_frame(cls, frame, lat='lat', lon='lon', district=None, cell_km=2.0):
+        """Index the rows of `frame`, labelling results with the frame's index."""
+        index = cls(frame[lat], frame[lon],
+                    district=None if district is None else frame[district],
+                    cell_km=cell_km)
+        index.labels = frame.index
+        return index
+
+    def __len__(self):
+        return len(self.lat)
+
+    def _cell(self, lat, lon):
+        rows = np.floor((lat - self.lat0) / self.dlat).astype(np.int64)
+        cols = np.floor((lon - self.lon0) / self.dlon).astype(np.int64)
+        return rows, cols
+
+    def _gather(self, row_lo, row_hi, col_lo, col_hi):
+        """Positions of the schools in the cells of an inclusive row/column range."""
+        row_lo, col_lo = max(row_lo, 0), max(col_lo, 0)
+        row_hi, col_hi = min(row_hi, self.n_rows - 1), min(col_hi, self.n_cols - 1)
+        if row_lo > row_hi or col_lo > col_hi:
+            return np.array([], dtype=np.intp)
+        # each grid row of the range is one contiguous run of keys
+        rows = np.arange(row_lo, row_hi + 1)
+        starts = np.searchsorted(self.keys, rows * self.n_cols + col_lo, 'left')
+        stops = np.searchsorted(self.keys, rows * self.n_cols + col_hi, 'right')
+        return np.concatenate([self.positions[a:b] for a, b in zip(starts, stops)])
+
+    def _result(self, positions, distances=None):
+        if distances is None:
+            positions = np.sort(positions)
+            return self.labels[positions]
+        order = np.argsort(distances, kind='stable')
+        return pd.Series(distances[order], index=self.labels[positions[order]], name='km')
+
+    def box(self, south, west, north, east):
+        """Labels of the schools inside a latitude/longitude box."""
+        (row_lo, row_hi), (col_lo, col_hi) = self._cell(np.array([south, north]),
+                                                        np.array([west, east]))
+        candidates = self._gather(row_lo, row_hi, col_lo, col_hi)
+        lat, lon = self.lat[candidates], self.lon[candidates]
+        inside = (lat >= south) & (lat <= north) & (lon >= west) & (lon <= east)
+        return self._result(candidates[inside])
+
+    def _within(self, lat, lon, km):
+        reach_lat = km / km_per_degree
+        reach_lon = km / (km_per_degree * max(np.cos(np.radians(abs(lat) + reach_lat)), 1e-6))
+        (row_lo, row_hi), (col_lo, col_hi) = self._cell(
+            np.array([lat - reach_lat, lat + reach_lat]),
+            np.array([lon - reach_lon, lon + reach_lon]))
+        candidates = self._gather(row_lo, row_hi, col_lo, col_hi)
+        distances = haversine(lat, lon, self.lat[candidates], self.lon[candidates])
+        inside = distances <= km
+        return candidates[inside], distances[inside]
+
+    def radius(self, lat, lon, km):
+        """Distance (km) to every school within `km` of a point, nearest first."""
+        return self._result(*self._within(lat, lon, km))
+
+    def nearest(self, lat, lon, k=5):
+        """Distance (km) to the `k` schools nearest a point, nearest first.
+
+        Rings of cells around the point are added until the k-th distance is
+        shorter than the distance to any cell not yet searched.
+        """
+        k = min(k, len(self.positions))
+        if k == 0:
+            return self._result(np.array([], dtype=np.intp), np.array([]))
+        row, col = (int(v) for v in self._cell(np.array(lat), np.array(lon)))
+        ring = 0
+        while True:
+            candidates = self._gather(row - ring, row + ring, col - ring, col + ring)
+            covers_all = (row - ring <= 0 and col - ring <= 0
+                          and row + ring >= self.n_rows - 1 and col + ring >= self.n_cols - 1)
+            if len(candidates) >= k:
+                distances = haversine(lat, lon, self.lat[candidates], self.lon[candidates])
+                nearest = np.argpartition(distances, k - 1)[:k]
+                if covers_all or distances[nearest].max() <= ring * self.min_cell_km:
+                    return self._result(candidates[nearest], distances[nearest])
+            ring += 1
+
+    def district_stats(self, values, stats=('mean', 'count')):
+        """Per-district statistics of `values` (a frame or Series with one row per indexed school)."""
+        if self.district is None:
+            raise ValueError('the index was built without a district column')
+        frame = values.to_frame() if isinstance(values, pd.Series) else values
+        counts = self.district.counts()
+        table = {}
+        for col in frame.columns:
+            column = frame[col].to_numpy(dtype=np.float64)
+            for stat in stats:
+                if stat == 'mean':
+                    table[(col, stat)] = self.district.mean(column)
+                elif stat == 'count':
+                    valid = (self.district.codes >= 0) & ~np.isnan(column)
+                    table[(col, stat)] = pd.Series(
+                        np.bincount(self.district.codes[valid], minlength=len(counts)),
+                        index=counts.index)
+                else:
+                    raise ValueError('unsupported statistic {0!r}'.format(stat))
+        return pd.DataFrame(table)
+
+    def nearby_stats(self, lat, lon, km, values):
+        """Mean and count of `values` over the schools within `km` of a point."""
+        positions, _ = self._within(lat, lon, km)
+        frame = values.to_frame() if isinstance(values, pd.Series) else values
+        subset = frame.iloc[positions]
+        return pd.DataFrame({'mean': subset.mean(), 'count': subset.count()})
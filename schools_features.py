@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Derived key and coordinate columns for the NYC schools tables.
+#
+# Vectorized replacements for the per-row helpers the analysis used to
+# `.apply`: DBNs are built with string ops on whole columns and the
+# coordinates in `Location 1` are pulled out with one compiled pattern that
+# captures latitude and longitude together.
+
+import re
+
+import pandas as pd
+
+
+# "... \n(40.8427, -73.8848)" -> latitude, longitude
+coordinates_pattern = re.compile(r"\(([^,()]+),\s*([^,()]+)\)")
+
+
+def pad_csd(csd):
+    """Two-digit community school district, e.g. 1 -> '01'."""
+    return csd.astype(str).str.zfill(2)
+
+
+def build_dbn(csd, school_code):
+    """DBN (district-borough-number) from a district and a school code like 'M015'."""
+    return pad_csd(csd) + school_code
+
+
+def coordinates(location):
+    """Float `lat` and `lon` columns parsed from `Location 1` style addresses."""
+    parts = location.str.extract(coordinates_pattern)
+    return pd.DataFrame({
+        'lat': pd.to_numeric(parts[0], errors='coerce'),
+        'lon': pd.to_numeric(parts[1], errors='coerce'),
+    }, index=location.index)
+
+
+def school_district(dbn):
+    """The district part of a DBN (its first two characters)."""
+    return dbn.str[:2]
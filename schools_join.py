@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Multi-way join on a shared key (DBN for the schools tables).
+#
+# Chaining `merge` re-hashes the key and copies the growing wide frame once
+# per table. Here the key is factorized once into integer codes shared by all
+# tables, the inner joins are applied first to shrink the key set, and the
+# matching row positions of every table are worked out on those integer
+# arrays. Each table's columns are then gathered once into the result, so
+# the only wide frame ever built is the final one.
+#
+# Rows, duplicate handling and missing keys follow a chain of `merge` calls.
+# The base table's row order is kept (what pandas >= 2.2 does for inner joins
+# too), and a key repeated in a joined table repeats the matching rows in that
+# table's order.
+
+import numpy as np
+import pandas as pd
+from pandas.api.extensions import take
+
+
+class _Keyed:
+    """Row positions of one table grouped by key code."""
+
+    def __init__(self, codes, n_keys):
+        self.order = np.argsort(codes, kind='stable')
+        self.counts = np.bincount(codes, minlength=n_keys)
+        self.offsets = np.concatenate([[0], np.cumsum(self.counts)[:-1]])
+
+
+def _expand(positions, keys, table, how):
+    """Join the current result rows (by key code) to `table`, like one merge step."""
+    matches = table.counts[keys]
+    if how == 'left':
+        # rows without a match are kept once, with no partner
+        repeats = np.maximum(matches, 1)
+    else:
+        repeats = matches
+
+    source = np.repeat(np.arange(len(keys)), repeats)
+    within = np.arange(len(source)) - np.repeat(np.cumsum(repeats) - repeats, repeats)
+    hit = within < matches[source]
+    partner = np.full(len(source), -1, dtype=np.intp)
+    partner[hit] = table.order[table.offsets[keys[source[hit]]] + within[hit]]
+
+    positions = {name: pos[source] for name, pos in positions.items()}
+    return positions, keys[source], partner
+
+
+def join_tables(base, joins, on='DBN', suffixes=('_x', '_y')):
+    """Join `joins` ([(name, frame, 'left' | 'inner'), ...]) onto `base` by `on`.
+
+    Returns the joined frame and a per-table report of rows, distinct keys,
+    duplicated keys and keys dropped by the join.
+    """
+    frames = [('base', base)] + [(name, frame) for name, frame, _ in joins]
+    hows = {name: how for name, _, how in joins}
+    for how in hows.values():
+        if how not in ('left', 'inner'):
+            raise ValueError('unsupported join {0!r}'.format(how))
+
+    # one factorization shared by every table; like merge, missing keys
+    # match each other, so they get a code of their own
+    all_keys = pd.concat([frame[on] for _, frame in frames], ignore_index=True)
+    codes, uniques = pd.factorize(all_keys)
+    missing = len(uniques)
+    codes = np.where(codes >= 0, codes, missing)
+    n_keys = missing + 1
+    bounds = np.cumsum([len(frame) for _, frame in frames])[:-1]
+    table_codes = dict(zip([name for name, _ in frames], np.split(codes, bounds)))
+
+    # inner joins first: keys missing from any inner table can't survive
+    alive = np.zeros(n_keys, dtype=bool)
+    alive[table_codes['base']] = True
+    for name, how in hows.items():
+        if how == 'inner':
+            present = np.zeros(n_keys, dtype=bool)
+            present[table_codes[name]] = True
+            alive &= present
+
+    keep = np.flatnonzero(alive[table_codes['base']])
+    positions = {'base': keep}
+    keys = table_codes['base'][keep]
+
+    for name, how in hows.items():
+        keyed = _Keyed(table_codes[name], n_keys)
+        positions, keys, positions[name] = _expand(positions, keys, keyed, how)
+
+    # gather every table's columns once, suffixing clashing names like merge
+    columns = {}
+    for name, frame in frames:
+        pos = positions[name]
+        for col in frame.columns:
+            if name != 'base' and col == on:
+                continue
+            if isinstance(frame[col].dtype, np.dtype):
+                # plain numpy columns get merge's dtype promotion (int -> float) on misses
+                values = take(frame[col].to_numpy(), pos, allow_fill=name != 'base')
+            else:
+                values = frame[col].array.take(pos, allow_fill=name != 'base')
+            label = col
+            if col in columns:
+                # rename the earlier column in place so the column order holds
+                columns = {(key + suffixes[0] if key == col else key): value
+                           for key, value in columns.items()}
+                label = col + suffixes[1]
+            columns[label] = values
+    result = pd.DataFrame(columns)
+
+    report = []
+    for name, frame in frames:
+        counts = np.bincount(table_codes[name], minlength=n_keys)[:missing]
+        report.append({
+            'table': name,
+            'how': hows.get(name, 'base'),
+            'rows': len(frame),
+            'keys': int((counts > 0).sum()),
+            'duplicated_keys': int((counts > 1).sum()),
+            'dropped_keys': int(((counts > 0) & ~alive[:missing]).sum()),
+            'unmatched_rows': int((positions[name] < 0).sum()),
+        })
+    return result, pd.DataFrame(report).set_index('table')
@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Loading the NYC schools datasets.
+#
+# The eight source files are read concurrently, each with its own read
+# options (separator, encoding, the columns we keep and their types), and
+# every parsed table is cached as a feather file keyed by the hash of the
+# source file, so warm runs skip CSV parsing and windows-1252 decoding.
+
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pandas as pd
+
+from dataset_cache import DatasetCache
+
+
+# the survey questions we use (the survey files have ~1900 columns)
+survey_columns = (
+    "rr_s", "rr_t", "rr_p",
+    "N_s", "N_t", "N_p",
+    "saf_p_11", "com_p_11", "eng_p_11", "aca_p_11",
+    "saf_t_11", "com_t_11", "eng_t_11", "aca_t_11",
+    "saf_s_11", "com_s_11", "eng_s_11", "aca_s_11",
+    "saf_tot_11", "com_tot_11", "eng_tot_11", "aca_tot_11",
+)
+
+_survey = {
+    'sep': '\t',
+    'encoding': 'windows-1252',
+    'usecols': ['dbn'] + list(survey_columns),
+    'dtype': {'dbn': str},
+}
+
+# file name and read_csv options per table
+schemas = {
+    'ap_2010': ('ap_2010.csv', {'dtype': {'DBN': str}}),
+    'class_size': ('class_size.csv', {'dtype': {'CSD': 'int16', 'SCHOOL CODE': str}}),
+    'demographics': ('demographics.csv', {'dtype': {'DBN': str, 'schoolyear': 'int32'}}),
+    'graduation': ('graduation.csv', {'dtype': {'DBN': str, 'Cohort': str}}),
+    'hs_directory': ('hs_directory.csv', {'dtype': {'dbn': str}}),
+    'sat_results': ('sat_results.csv', {'dtype': {'DBN': str}}),
+    'survey_all': ('survey_all.txt', _survey),
+    'survey_d75': ('survey_d75.txt', _survey),
+}
+
+
+def read_table(path, options):
+    return pd.read_csv(path, **options)
+
+
+def load_schools(directory='schools', tables=None, cache=None, executor='thread',
+                 max_workers=None):
+    """Read the `tables` (default: all in `schemas`) from `directory` concurrently.
+
+    `executor` is 'thread' or 'process'; with processes the parsing runs in
+    worker processes while cache bookkeeping stays in this one. Pass
+    `cache=False` to always parse the files.
+    """
+    if tables is None:
+        tables = list(schemas)
+    if cache is None:
+        cache = DatasetCache()
+    if max_workers is None:
+        max_workers = min(len(tables), os.cpu_count() or 1)
+
+    pool = None
+    if executor == 'process':
+        pool = ProcessPoolExecutor(max_workers=max_workers)
+    elif executor != 'thread':
+        raise ValueError("executor must be 'thread' or 'process'")
+
+    def load(name):
+        filename, options = schemas[name]
+
+        def parse(path):
+            if pool is None:
+                return read_table(path, options)
+            return pool.submit(read_table, path, options).result()
+
+        path = os.path.join(directory, filename)
+        if cache is False:
+            return parse(path)
+        return cache.fetch(os.path.abspath(path), parse, variant=repr(options))
+
+    try:
+        # threads wait on the cache and the files, processes (if any) parse
+        with ThreadPoolExecutor(max_workers=max_workers) as threads:
+            frames = list(threads.map(load, tables))
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return dict(zip(tables, frames))
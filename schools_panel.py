@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# The NYC schools pipeline for every school year at once.
+#
+# The analysis looks at one slice of the data: demographics for one school
+# year and the graduation cohort that finished around it. `run_panel` runs
+# the slice, merge and correlation stages for every school year in a worker
+# process of its own and stacks the results into panels indexed by school
+# year and cohort.
+#
+# The parsed tables are shared with the workers rather than sent per task:
+# where processes fork they inherit them copy-on-write, and elsewhere each
+# worker receives them once when it starts.
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from correlations import Correlator
+from imputation import impute
+from schools_join import join_tables
+
+
+# tables shared with the worker processes, set before they start
+_shared = None
+
+
+def _share(shared):
+    global _shared
+    _shared = shared
+
+
+def cohort_for(schoolyear):
+    """The graduation cohort paired with a school year (20112012 -> '2006')."""
+    return str(schoolyear // 10000 - 5)
+
+
+def slices(data):
+    """(schoolyear, cohort) pairs present in both demographics and graduation."""
+    cohorts = set(data["graduation"]["Cohort"].unique())
+    years = sorted(data["demographics"]["schoolyear"].unique())
+    return [(int(year), cohort_for(year)) for year in years if cohort_for(year) in cohorts]
+
+
+def select_slice(data, schoolyear, cohort):
+    """`data` with demographics and graduation cut down to one school year and cohort."""
+    tables = dict(data)
+    demographics = data["demographics"]
+    tables["demographics"] = demographics[demographics["schoolyear"] == schoolyear]
+    graduation = data["graduation"]
+    tables["graduation"] = graduation[(graduation["Cohort"] == cohort)
+                                      & (graduation["Demographic"] == "Total Cohort")]
+    return tables
+
+
+def combine(tables, to_merge, base="sat_results", strategy="mean", by=None):
+    """Join the `to_merge` tables onto `base` and fill the gaps.
+
+    Numeric gaps get the `strategy` of their group in `by` (default: the
+    column mean), anything left gets 0. Returns the combined frame, the join
+    report and the `Missingness` of the filled cells.
+    """
+    combined, report = join_tables(tables[base],
+                                   [(name, tables[name], how) for name, how in to_merge],
+                                   on="DBN")
+    missing = impute(combined, strategy=strategy, by=by)
+    return combined, report, missing
+
+
+def run_slice(data, to_merge, schoolyear, cohort, target="sat_score"):
+    """Combined frame and correlations with `target` for one school year and cohort."""
+    combined, _, missing = combine(select_slice(data, schoolyear, cohort), to_merge)
+    return combined, Correlator(combined, missing).with_target(target)
+
+
+def _run_shared(schoolyear, cohort):
+    data, to_merge, target = _shared
+    return run_slice(data, to_merge, schoolyear, cohort, target)
+
+
+def run_panel(data, to_merge, pairs=None, target="sat_score", max_workers=None):
+    """Run every (schoolyear, cohort) in `pairs` (default: `slices(data)`) in parallel.
+
+    Returns the stacked combined frames and a frame of correlations with
+    `target`, one row per school year, both indexed by (schoolyear, cohort).
+    `max_workers=1` runs the slices in this process.
+    """
+    if pairs is None:
+        pairs = slices(data)
+    pairs = list(pairs)
+    if not pairs:
+        raise ValueError("no school year has both demographics and a graduation cohort")
+    if max_workers is None:
+        max_workers = min(len(pairs), os.cpu_count() or 1)
+
+    shared = (data, to_merge, target)
+    if max_workers <= 1 or len(pairs) <= 1:
+        results = [run_slice(data, to_merge, year, cohort, target) for year, cohort in pairs]
+    else:
+        if "fork" in multiprocessing.get_all_start_methods():
+            _share(shared)
+            pool = ProcessPoolExecutor(max_workers=max_workers,
+                                       mp_context=multiprocessing.get_context("fork"))
+        else:
+            pool = ProcessPoolExecutor(max_workers=max_workers,
+                                       initializer=_share, initargs=(shared,))
+        try:
+            with pool:
+                futures = [pool.submit(_run_shared, year, cohort) for year, cohort in pairs]
+                results = [future.result() for future in futures]
+        finally:
+            _share(None)
+
+    names = ["schoolyear", "cohort"]
+    index = pd.MultiIndex.from_tuples(pairs, names=names)
+    combined = pd.concat([frame for frame, _ in results], keys=pairs, names=names + [None])
+    correlations = pd.DataFrame([corr for _, corr in results], index=index)
+    return combined, correlations
@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Are two segments really different? Permutation tests and bootstrap
+# intervals for differences in per-column means (ranking means, seen rates).
+#
+# A batch of permutations is a 0/1 matrix (permutations x rows) marking the
+# rows shuffled into the first segment, so the segment sums of every column
+# for the whole batch are one matrix product (and missing answers are handled
+# by a second product counting the answered rows). Bootstrap resamples are
+# index matrices turned into per-row draw counts and used the same way. Every column of a segment
+# pair is tested together, segment pairs are spread over a process pool like
+# `bootstrap_ci` does with groups, and each pair draws from its own child of
+# one SeedSequence.
+
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from bootstrap import batch_elements
+
+
+def pairs_within(cube, dimension):
+    """Every pair of segments of one demographic of a `SegmentCube`."""
+    levels = cube.levels[cube.dimensions.index(dimension)]
+    return [({dimension: a}, {dimension: b}) for a, b in itertools.combinations(levels, 2)]
+
+
+def _resampled_means(rng, size, values, answered):
+    """Column means of `size` bootstrap resamples of the rows of `values`."""
+    n = len(values)
+    if not n:
+        return np.full((size, values.shape[1]), np.nan)
+    draws = rng.integers(0, n, size=(size, n)) + (np.arange(size) * n)[:, None]
+    counts = np.bincount(draws.ravel(), minlength=size * n).reshape(size, n)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (counts @ values) / (counts @ answered)
+
+
+def difference_test(a, b, n_permutations=10000, n_resamples=10000, confidence=0.95, seed=None):
+    """Permutation p-values and bootstrap intervals for mean(a) - mean(b), per column.
+
+    `a` and `b` are (rows x columns) arrays that may contain NaN (unanswered).
+    """
+    rng = np.random.default_rng(seed)
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    pooled = np.concatenate([a, b])
+    answered = (~np.isnan(pooled)).astype(np.float64)
+    values = np.where(np.isnan(pooled), 0.0, pooled)
+    n_a, n = len(a), len(pooled)
+    totals = values.sum(axis=0)
+    total_answered = answered.sum(axis=0)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_a = values[:n_a].sum(axis=0) / answered[:n_a].sum(axis=0)
+        mean_b = values[n_a:].sum(axis=0) / answered[n_a:].sum(axis=0)
+    observed = mean_a - mean_b
+
+    membership = np.zeros(n)
+    membership[:n_a] = 1.0
+    batch = max(1, batch_elements // max(n, 1))
+    extreme = np.zeros(pooled.shape[1])
+    for start in range(0, n_permutations, batch):
+        size = min(batch, n_permutations - start)
+        in_a = rng.permuted(np.broadcast_to(membership, (size, n)), axis=1)
+        sums_a = in_a @ values
+        count_a = in_a @ answered
+        with np.errstate(invalid='ignore', divide='ignore'):
+            diff = sums_a / count_a - (totals - sums_a) / (total_answered - count_a)
+        extreme += (np.abs(diff) >= np.abs(observed) - 1e-12).sum(axis=0)
+    p_value = (extreme + 1) / (n_permutations + 1)
+
+    replicates = np.empty((n_resamples, pooled.shape[1]))
+    for start in range(0, n_resamples, batch):
+        size = min(batch, n_resamples - start)
+        replicates[start:start + size] = (
+            _resampled_means(rng, size, values[:n_a], answered[:n_a])
+            - _resampled_means(rng, size, values[n_a:], answered[n_a:]))
+    alpha = (1 - confidence) / 2
+    low, high = np.nanquantile(replicates, [alpha, 1 - alpha], axis=0)
+
+    return pd.DataFrame({
+        'n_a': answered[:n_a].sum(axis=0).astype(int),
+        'n_b': answered[n_a:].sum(axis=0).astype(int),
+        'mean_a': mean_a, 'mean_b': mean_b, 'difference': observed,
+        'p_value': p_value, 'low': low, 'high': high,
+    })
+
+
+def _test_task(args):
+    a, b, n_permutations, n_resamples, confidence, seed = args
+    return difference_test(a, b, n_permutations, n_resamples, confidence, seed)
+
+
+def _adjust(p_values):
+    """Benjamini-Hochberg adjusted p-values."""
+    p = np.asarray(p_values, dtype=np.float64)
+    order = np.argsort(p)
+    ranked = p[order] * len(p) / np.arange(1, len(p) + 1)
+    adjusted = np.minimum.accumulate(ranked[::-1])[::-1].clip(max=1)
+    out = np.empty_like(adjusted)
+    out[order] = adjusted
+    return out
+
+
+def segment_tests(frame, columns, pairs, cube, n_permutations=10000, n_resamples=10000,
+                  confidence=0.95, seed=None, processes=None):
+    """Test mean differences of `columns` for every pair of segments in `pairs`.
+
+    `pairs` holds (segment, segment) dicts as used by `cube.rows` (a
+    `SegmentCube` over `frame`). Returns one row per pair and column, with
+    Benjamini-Hochberg adjusted p-values across all of them. Pass `seed` for
+    reproducible results and `processes=1` to stay in the current process.
+    """
+    columns = list(columns)
+    values = np.column_stack([frame[col].to_numpy(dtype=np.float64, na_value=np.nan)
+                              for col in columns])
+    seeds = np.random.SeedSequence(seed).spawn(len(pairs))
+    tasks = [(values[cube.rows(a)], values[cube.rows(b)], n_permutations, n_resamples,
+              confidence, pair_seed)
+             for (a, b), pair_seed in zip(pairs, seeds)]
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if processes == 1 or len(tasks) < 2:
+        results = [_test_task(task) for task in tasks]
+    else:
+        # big pairs first so the pool doesn't end up waiting on one of them
+        order = sorted(range(len(tasks)), key=lambda i: -(len(tasks[i][0]) + len(tasks[i][1])))
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            results = [None] * len(tasks)
+            for i, result in zip(order, pool.map(_test_task, [tasks[i] for i in order])):
+                results[i] = result
+
+    labels = [(', '.join(map(str, a.values())), ', '.join(map(str, b.values()))) for a, b in pairs]
+    table = pd.concat(
+        [result.assign(column=columns) for result in results],
+        keys=labels, names=['a', 'b', None])
+    table = table.set_index('column', append=True).droplevel(2)
+    table['p_adjusted'] = _adjust(table['p_value'])
+    return table
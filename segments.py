@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Survey metrics for every demographic segment from one pass over the rows.
+#
+# Each demographic column is coded as integers and the codes are combined
+# into one cell number per respondent, so a single `np.bincount` per metric
+# gives respondent counts, sums and answer counts for every combination of
+# all the demographics at once. Any segment table (one demographic, or a
+# combination of several) is that cube summed over the demographics left
+# out, and is cached, so comparing segments never filters or copies the
+# respondents again.
+
+import itertools
+
+import numpy as np
+import pandas as pd
+
+
+demographics = ('Gender', 'Age', 'Household Income', 'Education', 'Location (Census Region)')
+
+
+def _label(segment):
+    return ', '.join(str(value) for value in segment.values())
+
+
+class SegmentCube:
+    """Counts, sums and means of `frame` columns over every demographic segment.
+
+    `sums` columns are added up per segment (e.g. seen flags) and `means`
+    columns are averaged over the respondents who answered (rankings, yes/no
+    rates). Respondents with no answer for a demographic are left out of the
+    segments of that demographic.
+    """
+
+    def __init__(self, frame, dimensions=demographics, sums=(), means=()):
+        self.dimensions = list(dimensions)
+        self.sums = list(sums)
+        self.means = list(means)
+        self.n_rows = len(frame)
+        self.levels = []
+        self.codes = {}
+        cells = []
+        for dim in self.dimensions:
+            column = frame[dim]
+            if isinstance(column.dtype, pd.CategoricalDtype):
+                codes, levels = column.cat.codes.to_numpy(), column.cat.categories
+            else:
+                codes, levels = pd.factorize(column, sort=True)
+            self.codes[dim] = codes
+            self.levels.append(pd.Index(levels, name=dim))
+            # missing answers go in an extra last level
+            cells.append(np.where(codes < 0, len(levels), codes))
+        self.shape = tuple(len(levels) + 1 for levels in self.levels)
+        size = int(np.prod(self.shape))
+        cell = np.ravel_multi_index(cells, self.shape) if cells else np.zeros(len(frame), dtype=np.intp)
+        # each respondent's cell, for cubes of other per-respondent data
+        self.cell = cell
+
+        metrics = self.sums + self.means
+        self.respondents = np.bincount(cell, minlength=size).reshape(self.shape)
+        self.totals = np.empty(self.shape + (len(metrics),))
+        self.answered = np.empty(self.shape + (len(metrics),))
+        for k, col in enumerate(metrics):
+            values = frame[col].to_numpy(dtype=np.float64, na_value=np.nan)
+            valid = ~np.isnan(values)
+            self.totals[..., k] = np.bincount(cell[valid], weights=values[valid],
+                                              minlength=size).reshape(self.shape)
+            self.answered[..., k] = np.bincount(cell[valid], minlength=size).reshape(self.shape)
+        self._tables = {}
+
+    def ordered(self, dims):
+        """`dims` (one name or several) in the cube's dimension order."""
+        dims = [dims] if isinstance(dims, str) else list(dims)
+        unknown = [dim for dim in dims if dim not in self.dimensions]
+        if unknown:
+            raise KeyError(', '.join(unknown))
+        return tuple(sorted(dims, key=self.dimensions.index))
+
+    def marginal(self, array, dims=(), include_missing=False):
+        """Sum a cube-shaped `array` (cells first, then any trailing axes) down to `dims`.
+
+        Returns the sums with one row per segment and the segments' index.
+        """
+        dims = self.ordered(dims)
+        axes = tuple(i for i, dim in enumerate(self.dimensions) if dim not in dims)
+        keep = [self.dimensions.index(dim) for dim in dims]
+        summed = array.sum(axis=axes)
+        if not include_missing:
+            summed = summed[tuple(slice(0, self.shape[i] - 1) for i in keep)]
+        summed = summed.reshape((-1,) + array.shape[len(self.dimensions):])
+
+        if dims:
+            levels = []
+            for i in keep:
+                level = self.levels[i]
+                if include_missing:
+                    level = level.append(pd.Index([np.nan], name=level.name))
+                levels.append(level)
+            index = pd.MultiIndex.from_product(levels) if len(levels) > 1 else levels[0]
+        else:
+            index = pd.Index(['all'])
+        return summed, index
+
+    def table(self, dims=(), include_missing=False):
+        """Metrics per segment of the demographics in `dims` (none: everyone)."""
+        dims = self.ordered(dims)
+        key = (dims, include_missing)
+        if key in self._tables:
+            return self._tables[key]
+
+        respondents, index = self.marginal(self.respondents, dims, include_missing)
+        totals, _ = self.marginal(self.totals, dims, include_missing)
+        answered, _ = self.marginal(self.answered, dims, include_missing)
+        n_sums = len(self.sums)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = totals[:, n_sums:] / answered[:, n_sums:]
+
+        columns = {'respondents': respondents}
+        columns.update(zip(self.sums, totals[:, :n_sums].T))
+        columns.update(zip(self.means, means.T))
+        table = pd.DataFrame(columns, index=index)
+        table = table[table['respondents'] > 0]
+        self._tables[key] = table
+        return table
+
+    def precompute(self, max_order=2):
+        """Build the tables for every combination of up to `max_order` demographics."""
+        for order in range(max_order + 1):
+            for dims in itertools.combinations(self.dimensions, order):
+                self.table(dims)
+
+    def lookup(self, segment):
+        """Metrics of one segment, e.g. {'Gender': 'Female', 'Age': '18-29'}."""
+        dims = self.ordered(segment)
+        table = self.table(dims)
+        key = tuple(segment[dim] for dim in dims)
+        return table.loc[key if len(key) > 1 else key[0]]
+
+    def compare(self, a, b):
+        """Metrics of two segments side by side with their difference (a - b)."""
+        first, second = self.lookup(a), self.lookup(b)
+        return pd.DataFrame({_label(a): first, _label(b): second, 'difference': first - second})
+
+    def rows(self, segment):
+        """Boolean mask of the respondents in a segment."""
+        mask = np.ones(self.n_rows, dtype=bool)
+        for dim, value in segment.items():
+            level = self.levels[self.dimensions.index(dim)].get_loc(value)
+            mask &= self.codes[dim] == level
+        return mask
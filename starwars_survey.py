@@ -8,9 +8,13 @@
 
 #import libraries
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-import numpy as np
+from plotting import plt, inline
+from viewing import ViewingMatrix, originals
+from rankings import RankAggregate
+from segments import SegmentCube, demographics
+from segment_tests import segment_tests
+from survey_schema import compile_schema
+from favorability import FavorabilityMatrix
 
 
 # In[110]:
@@ -32,20 +36,53 @@ star_wars.head(10)
 star_wars.columns
 
 
-# ### Cleaning and Mapping Yes/No Columns
+# ### Cleaning the Survey Columns
 
 # In[113]:
 
 
-#create mapping for yes/no columns
-yes_no = {
-    "Yes": True,
-    "No": False
-}
-
-#convert columns to bool type with True or False values
-star_wars['Have you seen any of the 6 films in the Star Wars franchise?'] = star_wars['Have you seen any of the 6 films in the Star Wars franchise?'].map(yes_no)
-star_wars['Do you consider yourself to be a fan of the Star Wars film franchise?'] = star_wars['Do you consider yourself to be a fan of the Star Wars film franchise?'].map(yes_no)
+#the export spreads most questions over several columns: the question heads
+#the first one and the rest are "Unnamed: N". Each group of columns is
+#described once with its values and cleaned in one go; a value the schema
+#doesn't know raises an error instead of quietly becoming NaN
+yes_no_cols = ['Have you seen any of the 6 films in the Star Wars franchise?',
+               'Do you consider yourself to be a fan of the Star Wars film franchise?']
+
+seen_cols = ['seen_1', 'seen_2', 'seen_3', 'seen_4', 'seen_5', 'seen_6']
+films = [
+    "Star Wars: Episode I  The Phantom Menace",
+    "Star Wars: Episode II  Attack of the Clones",
+    "Star Wars: Episode III  Revenge of the Sith",
+    "Star Wars: Episode IV  A New Hope",
+    "Star Wars: Episode V The Empire Strikes Back",
+    "Star Wars: Episode VI Return of the Jedi"
+]
+
+rank_cols = ['ranking_1', 'ranking_2', 'ranking_3', 'ranking_4', 'ranking_5', 'ranking_6']
+
+characters = [
+    'Han Solo', 'Luke Skywalker', 'Princess Leia Organa', 'Anakin Skywalker',
+    'Obi Wan Kenobi', 'Emperor Palpatine', 'Darth Vader', 'Lando Calrissian',
+    'Boba Fett', 'C-3P0', 'R2 D2', 'Jar Jar Binks', 'Padme Amidala', 'Yoda'
+]
+favorability_levels = [
+    'Very unfavorably',
+    'Somewhat unfavorably',
+    'Neither favorably nor unfavorably (neutral)',
+    'Somewhat favorably',
+    'Very favorably'
+]
+
+normalize = compile_schema([
+    {'kind': 'yes_no', 'columns': yes_no_cols},
+    {'kind': 'checkbox', 'names': seen_cols, 'values': films,
+     'start': "Which of the following Star Wars films have you seen? Please select all that apply."},
+    {'kind': 'rank', 'names': rank_cols,
+     'start': "Please rank the Star Wars films in order of preference with 1 being your favorite film in the franchise and 6 being your least favorite film."},
+    {'kind': 'likert', 'names': characters, 'levels': favorability_levels, 'other': ['Unfamiliar (N/A)'],
+     'start': "Please state whether you view the following characters favorably, unfavorably, or are unfamiliar with him/her."},
+])
+star_wars = normalize(star_wars)
 
 
 # In[114]:
@@ -61,88 +98,24 @@ star_wars['Have you seen any of the 6 films in the Star Wars franchise?'].value_
 star_wars['Do you consider yourself to be a fan of the Star Wars film franchise?'].value_counts(dropna=False)
 
 
-# ### Cleaning and Mapping Checkbox Columns
-
-# In[116]:
-
-
-#column names
-names = star_wars.columns[3:9]
-names
-
-
-# In[117]:
-
-
-#map for new column names
-name_map = {
-    "Which of the following Star Wars films have you seen? Please select all that apply.":"seen_1",
-    'Unnamed: 4' : 'seen_2',
-    "Unnamed: 5" : "seen_3",
-    "Unnamed: 6" : 'seen_4',
-    "Unnamed: 7" : 'seen_5',
-    'Unnamed: 8' : 'seen_6'
-}
-
-#rename columns using map above
-star_wars = star_wars.rename(columns=name_map)
-
-
-# In[118]:
-
-
-#check column names
-star_wars.columns
-
-
-# In[119]:
-
-
-#mapping col values
-seen_mapping = {
-    "Star Wars: Episode I  The Phantom Menace": True,
-    np.nan: False,
-    "Star Wars: Episode II  Attack of the Clones": True,
-    "Star Wars: Episode III  Revenge of the Sith": True,
-    "Star Wars: Episode IV  A New Hope": True,
-    "Star Wars: Episode V The Empire Strikes Back": True,
-    "Star Wars: Episode VI Return of the Jedi": True
-}
-
+# ### The Checkbox Columns
 
 # In[120]:
 
 
-#apply map to columns
-for col in star_wars.columns[3:9]:
-    star_wars[col] = star_wars[col].map(seen_mapping)
+#pack the six seen columns into one byte per respondent
+viewing = ViewingMatrix.from_frame(star_wars, seen_cols)
 
 #check
 star_wars.head()
 
 
-# ### Cleaning the Ranking Columns
-
-# In[121]:
-
-
-#convert columns to type float
-star_wars[star_wars.columns[9:15]] = star_wars[star_wars.columns[9:15]].astype(float)
-
+# ### The Ranking Columns
 
 # In[122]:
 
 
-#create ranking map for name changes
-star_wars = star_wars.rename(columns={
-        "Please rank the Star Wars films in order of preference with 1 being your favorite film in the franchise and 6 being your least favorite film.": "ranking_1",
-        "Unnamed: 10": "ranking_2",
-        "Unnamed: 11": "ranking_3",
-        "Unnamed: 12": "ranking_4",
-        "Unnamed: 13": "ranking_5",
-        "Unnamed: 14": "ranking_6"
-        })
-star_wars.columns[9:15]
+star_wars[rank_cols].dtypes
 
 
 # ### Finding the Highest Ranked Movies
@@ -150,7 +123,7 @@ star_wars.columns[9:15]
 # In[127]:
 
 
-movie_rank_cols = star_wars[['ranking_1','ranking_2', 'ranking_2', 'ranking_3', 'ranking_4', 'ranking_5', 'ranking_6']].mean()
+movie_rank_cols = star_wars[rank_cols].mean()
 
 movie_rank_cols
 
@@ -158,9 +131,9 @@ movie_rank_cols
 # In[135]:
 
 
-get_ipython().run_line_magic('matplotlib', 'inline')
+inline()
 
-plt.bar(range(6), star_wars[star_wars.columns[9:15]].mean())
+plt.bar(range(6), movie_rank_cols)
 
 plt.show()
 
@@ -168,26 +141,67 @@ plt.show()
 # #### Observation
 # So it appears that Episodes 4,5 and 6 and ranked on average higher than 1, 2 and 3. Episide 5 was the highest rated movie overall and episode 3 was the lowest. Episode 4, 5 and 6 are all of the original old Star Wars movies and 1, 2 and 3 are the newer ones. It's hard to say why these movies from different eras were rated differently. Perhaps nostalgia played a role in the ratings differences.
 
+# In[136]:
+
+
+#a mean rank can hide how the films compare head to head, so also count how
+#often each film was ranked above each other one and combine the rankings
+#with a few voting rules (respondents who skipped some films still count for
+#the pairs they did rank)
+consensus = RankAggregate.from_frame(star_wars, rank_cols)
+print('Condorcet winner:', consensus.condorcet_winner())
+consensus_summary = consensus.summary()
+consensus_summary
+
+
 # ### Finding the Most Viewed Movie
 
 # In[137]:
 
 
-plt.bar(range(6), star_wars[star_wars.columns[3:9]].sum())
+plt.bar(range(6), viewing.seen_counts())
 plt.show()
 
 
 # #### Observation
 # More people have seen the older movies than the newer ones so that reinforces the idea that the older movies were more popular.
 
+# ### Who Watched What Together
+
+# In[139]:
+
+
+#respondents who saw all three originals, and how many films people saw
+print(viewing.count_all(originals), 'saw all of episodes IV-VI')
+print(viewing.n_seen_counts())
+
+#co-viewing: how many respondents saw both films of each pair
+coviewing = viewing.coviewing()
+coviewing
+
+
+# In[140]:
+
+
+film_triples = viewing.combinations(3)
+film_triples.head(10)
+
+
 # ### Exploring Gender Specific Results
 
 # In[138]:
 
 
-#two new dataframes with data from male and female survey takers
-males = star_wars[star_wars['Gender'] == 'Male']
-females = star_wars[star_wars['Gender'] == 'Female']
+#seen counts, ranking means and fan/has-seen rates for every demographic
+#segment (and pairs of them) from one pass over the respondents
+segments = SegmentCube(star_wars, demographics, sums=seen_cols, means=rank_cols + yes_no_cols)
+segments.precompute(max_order=2)
+
+#male and female survey takers
+males = segments.lookup({'Gender': 'Male'})
+females = segments.lookup({'Gender': 'Female'})
+gender_comparison = segments.compare({'Gender': 'Male'}, {'Gender': 'Female'})
+gender_comparison
 
 
 # In[156]:
@@ -199,11 +213,11 @@ fig, ax = plt.subplots(1,2, figsize=(12,5))
 
 
 #plot male movie rankings
-ax[0].bar(range(6), males[males.columns[9:15]].mean())
+ax[0].bar(range(6), males[rank_cols])
 ax[0].set_title('Movie Rankings by Males')
 
 #plot female movie rankings
-ax[1].bar(range(6), females[females.columns[9:15]].mean())
+ax[1].bar(range(6), females[rank_cols])
 ax[1].set_title('Movie Ranking by Females')
 
 plt.show()
@@ -212,6 +226,16 @@ plt.show()
 # #### Observation
 # Males were very clear cut in their opinions, rating the older movies much higher overall than the newer ones. Females were also similar in their rankings, but actually rated Episode I better than Episode III. Both males and females agreed that Episide II was the worst of the movies, and Episode IV was the best. Both males and females seemed to prefer the older movies to the new ones.
 
+# In[157]:
+
+
+#are the male/female differences bigger than chance? permutation p-values and
+#bootstrap intervals for the difference in each ranking mean and seen rate
+gender_tests = segment_tests(star_wars, rank_cols + seen_cols,
+                             [({'Gender': 'Male'}, {'Gender': 'Female'})], segments, seed=0)
+gender_tests
+
+
 # In[158]:
 
 
@@ -220,11 +244,11 @@ fig, ax = plt.subplots(1,2, figsize=(12,5))
 
 
 #plot male movie rankings
-ax[0].bar(range(6), males[males.columns[3:9]].sum())
+ax[0].bar(range(6), males[seen_cols])
 ax[0].set_title('Most Viewed by Males')
 
 #plot female movie rankings
-ax[1].bar(range(6), females[females.columns[3:9]].sum())
+ax[1].bar(range(6), females[seen_cols])
 ax[1].set_title('Most Viewed by Females')
 
 plt.show()
@@ -233,6 +257,37 @@ plt.show()
 # #### Observation
 # Both males and females viewed the older movies on average more than the newer ones. Overall the older movies were more popular than the newer ones. Episode IV was viewed the most by both groups.
 
+# ### Character Favorability
+
+# In[159]:
+
+
+#one int8 answer per respondent and character (-2 very unfavorably .. 2 very
+#favorably, with unfamiliar kept apart) and the answer counts of every
+#demographic segment, so per-segment numbers are sums rather than regroupings
+favorability = FavorabilityMatrix(star_wars, characters)
+favorability_cube = favorability.cube(segments)
+favorability_counts = favorability.distribution()
+favorability_counts
+
+
+# In[160]:
+
+
+#net favorability (share favorable minus share unfavorable) by gender
+net_favorability = favorability_cube.net('Gender').T.sort_values('Female', ascending=False)
+net_favorability
+
+
+# In[161]:
+
+
+#do people who like a character rank that character's films differently?
+#(rank 1 is the favorite, so a negative correlation means a higher ranking)
+character_rank_correlations = favorability.rank_correlations(star_wars, rank_cols)
+character_rank_correlations
+
+
 # In[ ]:
 
 
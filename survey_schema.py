@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Declarative cleaning for wide survey exports.
+#
+# Survey exports put one question across many columns: the first column
+# carries the question text and the rest come out as "Unnamed: N". A schema
+# is a list of column groups, each with a kind and its value map, e.g.
+#
+#     {'kind': 'rank', 'start': 'Please rank the Star Wars films ...',
+#      'names': ['ranking_1', ..., 'ranking_6']}
+#
+# Kinds:
+#
+#     yes_no    'columns', optional 'values' (default Yes -> True, No -> False)
+#     checkbox  'start' or 'columns', 'names', 'values': the label each column
+#               holds when ticked; ticked -> True, blank -> False
+#     rank      'start' or 'columns', 'names'; ranks 1..len(names) as floats
+#     likert    'start' or 'columns', 'names', 'levels' from lowest to highest
+#               and optionally 'other' answers off the scale ("Unfamiliar");
+#               categoricals with the levels, then the other answers
+#
+# `compile_schema` builds the value lookups once. Normalizing a frame looks
+# every cell of a group up in one pass (an index lookup over the group's
+# values, giving integer codes) and raises as soon as a group holds a value
+# its map doesn't know, instead of quietly turning it into NaN.
+
+import numpy as np
+import pandas as pd
+
+
+yes_no = {'Yes': True, 'No': False}
+
+kinds = ('yes_no', 'checkbox', 'rank', 'likert')
+
+
+class _Group:
+    """One compiled column group."""
+
+    def __init__(self, spec):
+        self.kind = spec['kind']
+        if self.kind not in kinds:
+            raise ValueError('unknown column group kind {0!r}'.format(self.kind))
+        if ('start' in spec) == ('columns' in spec):
+            raise ValueError("a column group needs exactly one of 'start' or 'columns'")
+        self.start = spec.get('start')
+        self.columns = list(spec['columns']) if 'columns' in spec else None
+        self.names = list(spec['names']) if 'names' in spec else None
+        if self.start is not None and self.names is None:
+            raise ValueError("a group given by 'start' needs 'names'")
+
+        if self.kind == 'yes_no':
+            values = spec.get('values', yes_no)
+            self.keys = pd.Index(list(values), dtype=object)
+            self.lookup = np.array(list(values.values()), dtype=bool)
+        elif self.kind == 'checkbox':
+            self.keys = pd.Index(list(spec['values']), dtype=object)
+            if len(self.keys) != self.width:
+                raise ValueError('a checkbox group needs one value per column')
+        elif self.kind == 'rank':
+            ranks = np.arange(1, self.width + 1)
+            # ranks may arrive as numbers or as text
+            self.keys = pd.Index(list(ranks.astype(float)) + [str(rank) for rank in ranks],
+                                 dtype=object)
+            self.lookup = np.concatenate([ranks, ranks]).astype(np.float64)
+        else:
+            self.keys = pd.Index(list(spec['levels']) + list(spec.get('other', ())), dtype=object)
+
+    @property
+    def width(self):
+        return len(self.columns if self.columns is not None else self.names)
+
+    def source(self, frame):
+        """The frame columns this group covers."""
+        if self.columns is not None:
+            missing = [col for col in self.columns if col not in frame.columns]
+            if missing:
+                raise KeyError('columns not in the export: {0}'.format(', '.join(missing)))
+            return self.columns
+        start = frame.columns.get_loc(self.start)
+        columns = list(frame.columns[start:start + self.width])
+        if len(columns) != self.width:
+            raise KeyError('{0!r} is not followed by {1} columns'.format(self.start, self.width))
+        return columns
+
+    def normalize(self, frame):
+        """The source columns and {output name: normalized column} for this group."""
+        columns = self.source(frame)
+        names = self.names if self.names is not None else columns
+        block = frame[columns].to_numpy(dtype=object)
+        missing = pd.isna(block)
+        codes = self.keys.get_indexer(block.ravel()).reshape(block.shape)
+
+        unmapped = (codes < 0) & ~missing
+        if self.kind == 'checkbox':
+            # each column may only hold its own label
+            unmapped |= ~missing & (codes != np.arange(block.shape[1]))
+        if unmapped.any():
+            rows, cols = np.nonzero(unmapped)
+            found = sorted({(columns[c], str(block[r, c])) for r, c in zip(rows, cols)})[:5]
+            raise ValueError('unmapped values in {0} group: {1}'.format(
+                self.kind, ', '.join('{0!r} in {1!r}'.format(value, col) for col, value in found)))
+
+        out = {}
+        for j, name in enumerate(names):
+            code, blank = codes[:, j], missing[:, j]
+            if self.kind == 'yes_no':
+                column = pd.arrays.BooleanArray(self.lookup[np.where(blank, 0, code)], blank)
+            elif self.kind == 'checkbox':
+                column = ~blank
+            elif self.kind == 'rank':
+                column = np.where(blank, np.nan, self.lookup[np.where(blank, 0, code)])
+            else:
+                column = pd.Categorical.from_codes(code, categories=self.keys)
+            out[name] = pd.Series(column, index=frame.index)
+        return columns, out
+
+
+class Normalizer:
+    """A compiled schema; call it on a raw export to get the cleaned frame."""
+
+    def __init__(self, groups):
+        self.groups = [_Group(spec) for spec in groups]
+
+    def __call__(self, frame):
+        replaced = {}
+        for group in self.groups:
+            columns, out = group.normalize(frame)
+            for col, (name, column) in zip(columns, out.items()):
+                replaced[col] = (name, column)
+
+        # columns keep their positions; group columns are renamed in place
+        result = {}
+        for col in frame.columns:
+            name, column = replaced.get(col, (col, frame[col]))
+            result[name] = column
+        return pd.DataFrame(result, index=frame.index)
+
+
+def compile_schema(groups):
+    return Normalizer(groups)
@@ -0,0 +1,24 @@
+import pandas as pd
+import pytest
+
+from budget_optimizer import BudgetModel, market_table
+
+
+def model():
+    frame = pd.DataFrame({
+        'CountryLive': ['India', 'India', 'Canada', 'Canada', 'Canada', 'Germany'],
+        'money_per_month': [20.0, 40.0, 100.0, 80.0, 90.0, 60.0],
+    })
+    return BudgetModel(market_table(frame))
+
+
+def test_grid_pairs():
+    best = model().grid(k=2, step=0.1)
+    assert len(best) == 3
+    assert (best[['w1', 'w2']].sum(axis=1).round(9) == 1).all()
+
+
+@pytest.mark.parametrize('k', [0, 4])
+def test_grid_rejects_more_markets_than_available(k):
+    with pytest.raises(ValueError, match='k must be between 1 and the 3 markets'):
+        model().grid(k=k)
@@ -0,0 +1,29 @@
+import gc
+
+import numpy as np
+import pandas as pd
+
+from compaction import compact
+from correlations import Correlator
+
+
+def test_reassigned_compacted_column_is_not_served_stale():
+    rng = np.random.default_rng(0)
+    n = 500
+    frame = pd.DataFrame({
+        'target': rng.normal(size=n),
+        'count': rng.integers(0, 1000, size=n),
+    })
+    frame, _ = compact(frame)
+    assert frame['count'].dtype == np.int16
+    correlator = Correlator(frame)
+
+    for _ in range(50):
+        # replace the column twice with same-sized int16 arrays: the second
+        # replacement can be allocated where the cached column used to live
+        for _ in range(2):
+            frame['count'] = rng.integers(0, 1000, size=n).astype(np.int16)
+            gc.collect()
+        expected = frame['target'].corr(frame['count'].astype(np.float64))
+        r = correlator.with_target('target', ['count'])['count']
+        assert np.isclose(r, expected)
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from time_windows import TimeWindows
+from traffic_calendar import Calendar
+
+
+@pytest.fixture(params=['s', 'ms', 'us', 'ns'])
+def traffic(request):
+    # hourly readings across several years (and 1970), parsed in every unit
+    stamps = pd.date_range('1969-12-30', '2014-12-31 23:00', freq='h')
+    stamps = pd.DatetimeIndex(stamps.to_numpy().astype('datetime64[{0}]'.format(request.param)))
+    holiday = np.where((stamps.month == 7) & (stamps.day == 4) & (stamps.hour == 0),
+                       'Independence Day', 'None')
+    return pd.DataFrame({'date_time': stamps, 'holiday': holiday,
+                         'traffic_volume': np.arange(len(stamps)) % 7000})
+
+
+def test_fields_match_pandas(traffic):
+    calendar = Calendar.from_frame(traffic)
+    stamps = pd.DatetimeIndex(traffic['date_time'])
+    assert (calendar['hour'] == stamps.hour).all()
+    assert (calendar['day_of_week'] == stamps.dayofweek).all()
+    assert (calendar['month'] == stamps.month).all()
+    assert (calendar['year'] == stamps.year).all()
+    assert (calendar['is_weekend'] == (stamps.dayofweek >= 5)).all()
+    # the holiday covers its whole date, not just the hour it is named on
+    assert (calendar['holiday'] == ((stamps.month == 7) & (stamps.day == 4))).all()
+
+
+def test_features_are_read_only(traffic):
+    calendar = Calendar.from_frame(traffic)
+    with pytest.raises(ValueError):
+        calendar['hour'][0] = 1
+
+
+def test_windows_match_masks(traffic):
+    calendar = Calendar.from_frame(traffic)
+    hour = pd.DatetimeIndex(traffic['date_time']).hour
+    weekend = pd.DatetimeIndex(traffic['date_time']).dayofweek >= 5
+    windows = TimeWindows(calendar, {
+        'day': {'hour': (7, 19)},
+        'night': {'hour': (19, 7)},
+        'business day': {'hour': (7, 19), 'is_weekend': False},
+    })
+    expected = {
+        'day': (hour >= 7) & (hour < 19),
+        'night': (hour >= 19) | (hour < 7),
+        'business day': (hour >= 7) & (hour < 19) & ~weekend,
+    }
+    for name, mask in expected.items():
+        assert (windows.mask(name) == mask).all()
+
+    by_hour = windows.aggregate(traffic, ['traffic_volume'], 'mean', by='hour')
+    business = traffic[expected['business day']]
+    grouped = business.groupby(hour[expected['business day']])['traffic_volume'].mean()
+    assert np.allclose(by_hour.loc['business day', 'traffic_volume'].to_numpy(), grouped.to_numpy())
+
+
+def test_default_business_day_is_weekday_daytime(traffic):
+    calendar = Calendar.from_frame(traffic)
+    stamps = pd.DatetimeIndex(traffic['date_time'])
+    windows = TimeWindows(calendar)
+    daytime = (stamps.hour >= 7) & (stamps.hour < 19)
+    assert (windows.mask('business day') == (daytime & (stamps.dayofweek < 5))).all()
+    assert (windows.mask('weekend day') == (daytime & (stamps.dayofweek >= 5))).all()
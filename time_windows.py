@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Any number of (possibly overlapping) time windows over a `Calendar`,
+# assigned and aggregated in one pass.
+#
+# A window is a dict of conditions on calendar columns, e.g.
+#
+#     {'hour': (7, 19)}                        7am up to (not incl.) 7pm
+#     {'hour': (19, 7)}                        wraps past midnight
+#     {'hour': (6, 9), 'is_weekend': False}    weekday morning rush
+#     {'month': [12, 1, 2]}                    winter
+#
+# For every calendar column a window mentions, each possible value (hour
+# 0-23, month 1-12, ...) is binned once into a bitmask of the windows that
+# accept it; a row's membership is those bitmasks, looked up by its values
+# and and-ed together, one bit per window. Rows are then grouped by their
+# membership pattern (a handful of them) and the sums, counts and extremes of
+# every pattern come from `np.bincount`, so a window's statistics are the
+# sum over the patterns that include it and no window's rows are ever copied
+# out of the frame.
+
+import numpy as np
+import pandas as pd
+
+
+# day/night, daytime on business days and weekends, rush hours and the
+# (meteorological) seasons
+default_windows = {
+    'day': {'hour': (7, 19)},
+    'night': {'hour': (19, 7)},
+    'business day': {'hour': (7, 19), 'is_weekend': False},
+    'weekend day': {'hour': (7, 19), 'is_weekend': True},
+    'morning rush': {'hour': (6, 10), 'is_weekend': False},
+    'evening rush': {'hour': (15, 19), 'is_weekend': False},
+    'winter': {'month': [12, 1, 2]},
+    'spring': {'month': [3, 4, 5]},
+    'summer': {'month': [6, 7, 8]},
+    'autumn': {'month': [9, 10, 11]},
+}
+
+statistics = ('count', 'sum', 'mean', 'std', 'min', 'max')
+
+
+def _accepts(keys, condition):
+    """Which of the calendar values `keys` a condition accepts."""
+    if isinstance(condition, tuple):
+        start, stop = condition
+        if start <= stop:
+            return (keys >= start) & (keys < stop)
+        return (keys >= start) | (keys < stop)
+    if isinstance(condition, (list, set, frozenset, np.ndarray)):
+        return np.isin(keys, list(condition))
+    return keys == int(condition)
+
+
+class TimeWindows:
+    """Membership of every row of a `Calendar` in a set of named time windows."""
+
+    def __init__(self, calendar, windows=default_windows):
+        if len(windows) > 64:
+            raise ValueError('at most 64 windows fit in one membership mask')
+        self.calendar = calendar
+        self.names = list(windows)
+        self.bits = np.uint64(1) << np.arange(len(self.names), dtype=np.uint64)
+
+        membership = np.full(len(calendar), self.bits.sum(), dtype=np.uint64)
+        columns = {col for window in windows.values() for col in window}
+        for col in sorted(columns):
+            values = calendar[col].astype(np.intp)
+            low = int(values.min()) if len(values) else 0
+            keys = np.arange(low, int(values.max()) + 1 if len(values) else low)
+            table = np.zeros(len(keys), dtype=np.uint64)
+            for bit, window in zip(self.bits, windows.values()):
+                accept = _accepts(keys, window[col]) if col in window else np.ones(len(keys), dtype=bool)
+                table[accept] |= bit
+            membership &= table[values - low]
+        membership.flags.writeable = False
+        self.membership = membership
+
+        # rows grouped by which windows they are in
+        self.patterns, self._pattern = np.unique(membership, return_inverse=True)
+        # windows x patterns: 1 where the window includes the pattern
+        self._includes = ((self.patterns[None, :] & self.bits[:, None]) != 0)
+
+    def mask(self, name):
+        """Boolean mask of the rows in one window."""
+        return (self.membership & self.bits[self.names.index(name)]) != 0
+
+    def frame(self):
+        """Window membership of every row, one bool column per window."""
+        return pd.DataFrame({name: self.mask(name) for name in self.names},
+                            index=self.calendar.rows)
+
+    def counts(self):
+        """Rows in each window."""
+        per_pattern = np.bincount(self._pattern, minlength=len(self.patterns))
+        return pd.Series(self._includes @ per_pattern, index=self.names, name='rows')
+
+    def _per_window(self, per_group, n_keys):
+        """Sum per-(pattern, key) values into per-(window, key) values."""
+        return (self._includes @ per_group.reshape(len(self.patterns), n_keys)).ravel()
+
+    def aggregate(self, frame, columns, stats=statistics, by=None):
+        """Statistics of `columns` of `frame` per window (and per value of calendar column `by`).
+
+        `stats` is a sequence of count, sum, mean, std, min and max (columns
+        are then (column, stat) pairs) or a single one of them. Missing values
+        are skipped, as in a pandas groupby.
+        """
+        single = isinstance(stats, str)
+        wanted = [stats] if single else list(stats)
+        unknown = [stat for stat in wanted if stat not in statistics]
+        if unknown:
+            raise ValueError('unknown statistics: {0}'.format(', '.join(unknown)))
+        columns = list(columns)
+        n_patterns = len(self.patterns)
+
+        if by is None:
+            keys, group = np.zeros(1, dtype=np.intp), self._pattern
+        else:
+            values = self.calendar[by].astype(np.intp)
+            low = int(values.min()) if len(values) else 0
+            keys = np.arange(low, int(values.max()) + 1 if len(values) else low)
+            group = self._pattern * len(keys) + (values - low)
+        size = n_patterns * len(keys)
+
+        out, counts = {}, None
+        for col in columns:
+            data = frame[col].to_numpy(dtype=np.float64, na_value=np.nan)
+            valid = ~np.isnan(data)
+            where, data = group[valid], data[valid]
+            # centred on the column mean so the sums of squares keep their precision
+            shift = data.mean() if len(data) else 0.0
+            centred = data - shift
+
+            n = self._per_window(np.bincount(where, minlength=size).astype(np.float64), len(keys))
+            total = self._per_window(np.bincount(where, weights=centred, minlength=size), len(keys))
+            with np.errstate(invalid='ignore', divide='ignore'):
+                mean = total / n
+                if 'std' in wanted:
+                    squares = self._per_window(
+                        np.bincount(where, weights=centred ** 2, minlength=size), len(keys))
+                    std = np.sqrt(np.maximum(squares - total * mean, 0) / (n - 1))
+            result = {'count': n.astype(np.int64), 'sum': total + shift * n, 'mean': mean + shift}
+            if 'std' in wanted:
+                result['std'] = std
+            for stat, ufunc, fill in (('min', np.minimum, np.inf), ('max', np.maximum, -np.inf)):
+                if stat in wanted:
+                    extreme = np.full(size, fill)
+                    ufunc.at(extreme, where, data)
+                    extreme = extreme.reshape(n_patterns, len(keys))
+                    result[stat] = np.stack([
+                        ufunc.reduce(extreme[self._includes[w]], axis=0, initial=fill)
+                        for w in range(len(self.names))]).ravel()
+                    result[stat][n == 0] = np.nan
+            for stat in wanted:
+                out[col if single else (col, stat)] = result[stat]
+            counts = n if counts is None else np.maximum(counts, n)
+
+        if by is None:
+            index = pd.Index(self.names, name='window')
+        else:
+            index = pd.MultiIndex.from_product([self.names, keys], names=['window', by])
+        table = pd.DataFrame(out, index=index)
+        if not single:
+            table.columns = pd.MultiIndex.from_tuples(table.columns)
+        if by is not None and counts is not None:
+            # like a groupby, no rows for values a window never sees
+            table = table[counts > 0]
+        return table
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Calendar features of an hourly time series, computed once and shared.
+#
+# The timestamps are parsed a single time into a DatetimeIndex, and every
+# calendar field (hour, day of week, month, year, weekend and holiday flags)
+# is derived from whole hours, days and months since the epoch (numpy casts
+# that work whatever unit the timestamps were parsed in) with plain
+# arithmetic instead of a separate `.dt` decomposition per field. The fields are stored as int8/int16
+# (bool for the flags) arrays marked read-only, so any number of groupings
+# and masks can use them without copying, and nothing downstream can change
+# them by accident.
+
+import numpy as np
+import pandas as pd
+
+
+features = ('hour', 'day_of_week', 'month', 'year', 'is_weekend', 'holiday')
+
+
+def _read_only(array):
+    array.flags.writeable = False
+    return array
+
+
+class Calendar:
+    """Read-only calendar columns for the rows of a frame."""
+
+    def __init__(self, timestamps, holidays=None, index=None, format=None):
+        stamps = pd.DatetimeIndex(pd.to_datetime(timestamps, format=format))
+        if stamps.hasnans:
+            raise ValueError('{0} timestamps are missing'.format(int(stamps.isna().sum())))
+        if stamps.tz is not None:
+            # calendar fields follow the local wall clock
+            stamps = stamps.tz_localize(None)
+        self.index = stamps
+        self.rows = pd.RangeIndex(len(stamps)) if index is None else index
+
+        # whole hours, days and months since the epoch, whatever unit the
+        # timestamps were parsed in (pandas 2+ may give seconds or microseconds)
+        local = stamps.to_numpy()
+        hours = local.astype('datetime64[h]').astype(np.int64)
+        days = local.astype('datetime64[D]').astype(np.int64)
+        months = local.astype('datetime64[M]').astype(np.int64)
+        self._features = {
+            'hour': _read_only((hours % 24).astype(np.int8)),
+            # 1970-01-01 was a Thursday; Monday is 0 like `dt.dayofweek`
+            'day_of_week': _read_only(((days + 3) % 7).astype(np.int8)),
+            'month': _read_only((months % 12 + 1).astype(np.int8)),
+            'year': _read_only((months // 12 + 1970).astype(np.int16)),
+        }
+        self._features['is_weekend'] = _read_only(self._features['day_of_week'] >= 5)
+
+        marked = np.zeros(len(stamps), dtype=bool)
+        if holidays is not None:
+            names = pd.Series(np.asarray(holidays, dtype=object))
+            marked = (names.notna() & (names != 'None')).to_numpy()
+        # the export only names the holiday on its first hour: flag the whole date
+        self._features['holiday'] = _read_only(np.isin(days, np.unique(days[marked])))
+
+    @classmethod
+    def from_frame(cls, frame, column='date_time', holiday='holiday', format=None):
+        holidays = frame[holiday] if holiday is not None and holiday in frame.columns else None
+        return cls(frame[column], holidays, index=frame.index, format=format)
+
+    def __len__(self):
+        return len(self.index)
+
+    def __getitem__(self, name):
+        """One calendar column as a read-only array."""
+        if name not in self._features:
+            raise KeyError('unknown calendar feature {0!r}; one of {1}'.format(
+                name, ', '.join(features)))
+        return self._features[name]
+
+    def series(self, name):
+        """One calendar column as a Series on the frame's index (for groupby keys)."""
+        return pd.Series(self[name], index=self.rows, name=name, copy=False)
+
+    def frame(self, columns=features):
+        """Calendar columns as a frame on the frame's index."""
+        return pd.DataFrame({name: self[name] for name in columns}, index=self.rows)
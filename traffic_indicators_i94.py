@@ -33,8 +33,8 @@ print(traffic.info())
 
 
 #import libraries
-import matplotlib.pyplot as plt
-get_ipython().run_line_magic('matplotlib', 'inline')
+from plotting import plt, inline
+inline()
 
 #plot histogram to see distribution of traffic_volume column
 plt.hist(traffic['traffic_volume'])
@@ -54,15 +54,31 @@ print(traffic['traffic_volume'].describe())
 # In[4]:
 
 
-#convert date_time column to datetime data type
-traffic['date_time'] = pd.to_datetime(traffic['date_time'])
+from time_windows import TimeWindows, default_windows
+from traffic_calendar import Calendar
+
+#parse date_time once and derive hour, day of week, month, year, weekend and holiday columns from it
+calendar = Calendar.from_frame(traffic)
+traffic['date_time'] = calendar.index
+
+#the numeric measurements we average in every breakdown below
+measures = ['temp', 'rain_1h', 'snow_1h', 'clouds_all', 'traffic_volume']
+
+#label every row with the time windows it falls in, all in one pass: day
+#(7am-7pm) and night, daytime on business days and weekends, the weekday
+#rush hours and the seasons
+print(default_windows)
+windows = TimeWindows(calendar, default_windows)
+print(windows.counts())
 
 #isolate night traffic data
-night = traffic[(traffic['date_time'].dt.hour >= 19) | (traffic['date_time'].dt.hour < 7)]
+night_rows = windows.mask('night')
+night = traffic[night_rows]
 print(night.shape)
 
 #isolate the day traffic data
-day = traffic[(traffic['date_time'].dt.hour < 19) & (traffic['date_time'].dt.hour >= 7)]
+day_rows = windows.mask('day')
+day = traffic[day_rows]
 print(day.shape)
 
 
@@ -119,8 +135,7 @@ print(night['traffic_volume'].describe())
 
 
 #get monthly traffic averages for daytime traffic
-day['month'] = day['date_time'].dt.month
-by_month = day.groupby('month').mean()
+by_month = windows.aggregate(traffic, measures, 'mean', by='month').loc['day']
 by_month['traffic_volume']
 
 
@@ -136,9 +151,8 @@ plt.show()
 # In[19]:
 
 
-day['year'] = day['date_time'].dt.year
-july_only = day[day['month'] == 7]
-july_only.groupby('year').mean()['traffic_volume'].plot.line()
+july_only = day[calendar['month'][day_rows] == 7]
+july_only.groupby(calendar.series('year'))['traffic_volume'].mean().plot.line()
 plt.show()
 
 
@@ -155,8 +169,7 @@ plt.show()
 # In[20]:
 
 
-day['day_of_week'] = day['date_time'].dt.dayofweek
-by_day_of_week = day.groupby('day_of_week').mean()
+by_day_of_week = windows.aggregate(traffic, measures, 'mean', by='day_of_week').loc['day']
 by_day_of_week['traffic_volume'].plot.line()
 plt.show()
 
@@ -170,12 +183,10 @@ plt.show()
 # In[23]:
 
 
-#create hour column
-day['hour'] = day['date_time'].dt.hour
-business_days = day.copy()[day['day_of_week'] <= 4] #day 4 == Friday
-weekend_day = day.copy()[day['day_of_week'] >= 5] #day 5 == Saturday
-by_hour_business = business_days.groupby('hour').mean()
-by_hour_weekend = weekend_day.groupby('hour').mean()
+#hourly means of the business day and weekend day windows (day 5 == Saturday), without splitting the rows out
+by_hour = windows.aggregate(traffic, measures, 'mean', by='hour')
+by_hour_business = by_hour.loc['business day']
+by_hour_weekend = by_hour.loc['weekend day']
 
 print(by_hour_business['traffic_volume'])
 print(by_hour_weekend['traffic_volume'])
@@ -204,6 +215,14 @@ plt.title('Weekend hourly traffic volume')
 plt.show()
 
 
+# In[36]:
+
+
+#traffic volume in every window at once: day and night, rush hours, business days vs weekends and the seasons
+window_stats = windows.aggregate(traffic, ['traffic_volume'])
+window_stats
+
+
 # We can see as noted earlier, traffic volume on the weekend overall is much lower than on business days. Business days are busiest around 7-8 and again around 4-5. These times represent when most people are making their daily commute to and from work. One Difference between weekend traffic is that it actually peaks around 12pm and stays around that level for 4 hours and then begins to drop off again.
 # 
 # To summarize our findings so far:
@@ -220,8 +239,8 @@ plt.show()
 # In[37]:
 
 
-#find correlation of all columns to traffic_volume
-day.corr()['traffic_volume']
+#find correlation of the measurements and the calendar columns to traffic_volume
+day[measures].join(calendar.frame(['month', 'year', 'day_of_week', 'hour', 'holiday'])).corr()['traffic_volume']
 
 
 # The `temp` column shows the highest correlation to traffic volume, but it is only +0.13. Overall it appears there is a very weak correlation of weather on traffic volume.
@@ -243,8 +262,8 @@ plt.show()
 # In[54]:
 
 
-by_weather_main = day.groupby('weather_main').mean()
-by_weather_description = day.groupby('weather_description').mean()
+by_weather_main = day.groupby('weather_main')[measures].mean()
+by_weather_description = day.groupby('weather_description')[measures].mean()
 
 by_weather_main['traffic_volume'].plot.barh()
 plt.title('Traffic Volume by Type of Weather')
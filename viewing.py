@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Which of the six films each respondent has seen, as one byte.
+#
+# Bit i of a respondent's mask is set when they have seen film i + 1
+# (`seen_1`..`seen_6`). Since there are only 64 possible masks, counts over
+# any set of films come from a histogram of the masks rather than from the
+# respondents themselves: the co-viewing matrix, pair and triple counts and
+# "seen all of these" are sums over at most 64 histogram bins.
+
+import itertools
+
+import numpy as np
+import pandas as pd
+
+
+n_films = 6
+n_masks = 1 << n_films
+
+# Episodes IV, V and VI
+originals = 0b111000
+prequels = 0b000111
+
+# number of set bits in every possible mask
+popcount = np.array([bin(mask).count('1') for mask in range(n_masks)], dtype=np.uint8)
+
+# mask -> film membership, (64, 6)
+_bits = ((np.arange(n_masks)[:, None] >> np.arange(n_films)) & 1).astype(np.int64)
+
+
+def _supersets(mask):
+    """Which of the 64 masks contain every film in `mask`."""
+    return (np.arange(n_masks) & mask) == mask
+
+
+def pack_seen(seen):
+    """uint8 masks from an (n, 6) boolean frame or array of seen flags."""
+    seen = np.asarray(seen, dtype=bool)
+    if seen.ndim != 2 or seen.shape[1] != n_films:
+        raise ValueError('expected {0} seen columns, got shape {1}'.format(n_films, seen.shape))
+    weights = (1 << np.arange(n_films)).astype(np.uint8)
+    return (seen.astype(np.uint8) * weights).sum(axis=1, dtype=np.uint8)
+
+
+def films_mask(films):
+    """Mask of film numbers (1-6), e.g. [4, 5, 6] -> `originals`."""
+    mask = 0
+    for film in films:
+        mask |= 1 << (film - 1)
+    return mask
+
+
+class ViewingMatrix:
+    """Seen masks of every respondent, with their histogram."""
+
+    def __init__(self, masks, labels=None, index=None):
+        self.masks = np.asarray(masks, dtype=np.uint8)
+        self.labels = list(labels) if labels is not None else ['seen_{0}'.format(i + 1) for i in range(n_films)]
+        self.index = index if index is not None else pd.RangeIndex(len(self.masks))
+        self.histogram = np.bincount(self.masks, minlength=n_masks)
+
+    @classmethod
+    def from_frame(cls, frame, columns):
+        return cls(pack_seen(frame[list(columns)]), labels=columns, index=frame.index)
+
+    def __len__(self):
+        return len(self.masks)
+
+    def _histogram(self, rows=None):
+        if rows is None:
+            return self.histogram
+        return np.bincount(self.masks[np.asarray(rows)], minlength=n_masks)
+
+    def n_seen(self):
+        """Number of films each respondent has seen."""
+        return pd.Series(popcount[self.masks], index=self.index, name='n_seen')
+
+    def seen_all(self, mask=originals):
+        """Respondents who have seen every film in `mask`."""
+        return pd.Series((self.masks & mask) == mask, index=self.index)
+
+    def exactly(self, k):
+        """Respondents who have seen exactly `k` films."""
+        return pd.Series(popcount[self.masks] == k, index=self.index)
+
+    def count_all(self, mask, rows=None):
+        """Number of respondents (among `rows`) who have seen every film in `mask`."""
+        return int(self._histogram(rows)[_supersets(mask)].sum())
+
+    def seen_counts(self, rows=None):
+        """Respondents who have seen each film (among `rows`, a mask or positions)."""
+        return pd.Series(self._histogram(rows) @ _bits, index=self.labels)
+
+    def n_seen_counts(self, rows=None):
+        """How many respondents have seen 0, 1, ... 6 films."""
+        return pd.Series(np.bincount(popcount, weights=self._histogram(rows),
+                                     minlength=n_films + 1).astype(np.int64),
+                         name='respondents').rename_axis('films_seen')
+
+    def coviewing(self, rows=None):
+        """6x6 matrix of respondents who have seen both films (the diagonal: each film)."""
+        weighted = _bits * self._histogram(rows)[:, None]
+        return pd.DataFrame(weighted.T @ _bits, index=self.labels, columns=self.labels)
+
+    def combinations(self, size, rows=None):
+        """Respondents who have seen each combination of `size` films, most common first."""
+        histogram = self._histogram(rows)
+        counts = {}
+        for films in itertools.combinations(range(n_films), size):
+            mask = films_mask(film + 1 for film in films)
+            counts[tuple(self.labels[film] for film in films)] = int(histogram[_supersets(mask)].sum())
+        return pd.Series(counts, name='respondents').sort_values(ascending=False, kind='stable')